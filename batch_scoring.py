@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import time
+
+from results_store import atomic_write_text
+
+TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+
+def chat_request(custom_id, body):
+    """One line of a Batch API input file"""
+    return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+
+def parse_output(text):
+    """{custom_id: (content or None, usage dict or None, error or None)} from a batch output/error file"""
+    results = {}
+    for line in text.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+        error = entry.get("error") or (body.get("error") if response.get("status_code", 200) != 200 else None)
+        if error:
+            results[entry["custom_id"]] = (None, None, error.get("message", str(error)) if isinstance(error, dict) else error)
+            continue
+        try:
+            content = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            results[entry["custom_id"]] = (None, None, "malformed batch response")
+            continue
+        results[entry["custom_id"]] = (content, body.get("usage"), None)
+    return results
+
+
+# --- RESUMABLE BATCH ---
+class BatchRun:
+    """One OpenAI Batch API job whose ids are kept in a state file, so a restarted
+    process collects the batch it already paid for before submitting another one.
+    """
+
+    def __init__(self, client, state_path, log=print):
+        self.client = client
+        self.state_path = state_path
+        self.log = log
+        self.state = {}
+
+    @staticmethod
+    def fingerprint(requests):
+        h = hashlib.sha256()
+        for request in sorted(requests, key=lambda r: r["custom_id"]):
+            h.update(json.dumps(request, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()[:24]
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.state_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        atomic_write_text(self.state_path, json.dumps(self.state))
+
+    def resume(self):
+        """Pick up the batch an earlier run left in the state file; False if there is none worth waiting for"""
+        saved = self._load()
+        if not saved.get("batch_id") or saved.get("status") in ("failed", "expired", "cancelled"):
+            return False
+        self.state = saved
+        self.log(f"[cyan]↩️ Resuming batch {saved['batch_id']} ({saved.get('status')})[/cyan]")
+        return True
+
+    def submit(self, requests):
+        """Upload the requests and create a new batch, remembering its ids in the state file"""
+        fingerprint = self.fingerprint(requests)
+        data = "".join(json.dumps(r) + "\n" for r in requests).encode("utf-8")
+        upload = self.client.files.create(file=("score_requests.jsonl", data, "application/jsonl"), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h",
+            metadata={"fingerprint": fingerprint},
+        )
+        self.state = {"fingerprint": fingerprint, "input_file_id": upload.id, "batch_id": batch.id,
+                      "status": batch.status, "requests": len(requests), "submitted_at": time.time()}
+        self._save()
+        self.log(f"[cyan]📤 Submitted batch {batch.id} with {len(requests)} requests[/cyan]")
+        return batch.id
+
+    def wait(self, poll_interval=30, cancel=None):
+        """Poll until the batch reaches a terminal status; returns that status (or None if cancelled)"""
+        while True:
+            batch = self.client.batches.retrieve(self.state["batch_id"])
+            counts = batch.request_counts
+            self.state.update(status=batch.status, output_file_id=batch.output_file_id,
+                              error_file_id=batch.error_file_id)
+            self._save()
+            if batch.status in TERMINAL:
+                return batch.status
+            if counts is not None:
+                self.log(f"[cyan]⏳ Batch {batch.status}: {counts.completed}/{counts.total} done[/cyan]")
+            if cancel is not None and cancel.wait(poll_interval):
+                return None
+            if cancel is None:
+                time.sleep(poll_interval)
+
+    def results(self):
+        """Merged output and error files of a finished batch"""
+        results = {}
+        for key in ("error_file_id", "output_file_id"):
+            if self.state.get(key):
+                results.update(parse_output(self.client.files.content(self.state[key]).text))
+        return results
+
+    def finish(self):
+        """Forget the batch once its results have been merged"""
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
@@ -0,0 +1,83 @@
+"""Import-time benchmark for job_scraper.
+
+Runs `python -X importtime -c "import job_scraper"` in a clean subprocess (no API
+keys set) and times `job_scraper.py --help`, so startup regressions show up:
+
+    python bench_import.py --runs 5 --max-ms 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _clean_env():
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)
+    env.pop("RAPIDAPI_KEY", None)
+    return env
+
+
+def import_profile(module="job_scraper"):
+    """Return (total_us, [(cumulative_us, name), ...]) for module's own import tree"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, env=_clean_env(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+        elif name.strip() == module:
+            return int(cumulative), rows
+        else:
+            rows = []  # a different top-level import (e.g. site) finished
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def help_wall_time(runs):
+    """Wall-clock seconds for each `python job_scraper.py --help`"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "job_scraper.py", "--help"], cwd=HERE, env=_clean_env(),
+                       capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="exit non-zero if the median import time exceeds this")
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total, rows = import_profile()
+        totals.append(total / 1000)
+    import_ms = statistics.median(totals)
+    help_ms = statistics.median(help_wall_time(args.runs)) * 1000
+
+    print(f"import job_scraper: {import_ms:.1f} ms (median of {args.runs})")
+    print(f"job_scraper.py --help: {help_ms:.1f} ms wall clock")
+    print("slowest imports (cumulative, last run):")
+    for us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if args.max_ms is not None and import_ms > args.max_ms:
+        print(f"FAIL: import time {import_ms:.1f} ms exceeds {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""End-to-end pipeline benchmark against local JSearch/OpenAI stand-ins.
+
+Runs fetch -> score -> CSV/Parquet write through job_scraper.run_search for a
+range of synthetic posting counts and reports jobs/sec, p50/p95 latency per
+stage and peak memory, e.g.
+
+    python bench_pipeline.py --sizes 10 100 1000 --openai-latency 0.2 --throttle-rate 0.05
+    python bench_pipeline.py --sizes 1000 --pipeline --batch-size 5 --json bench.json
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+
+import job_scraper
+from mock_services import MockAPI, ServiceConfig
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class StageTimer:
+    """Wraps job_scraper functions to record the latency of every call"""
+
+    def __init__(self):
+        self.samples = {}
+        self._originals = []
+
+    def wrap(self, name, attr):
+        original = getattr(job_scraper, attr)
+        samples = self.samples.setdefault(name, [])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(job_scraper, attr, timed)
+        self._originals.append((attr, original))
+
+    def restore(self):
+        for attr, original in reversed(self._originals):
+            setattr(job_scraper, attr, original)
+        self._originals = []
+
+
+class _SilentConsole:
+    def log(self, *args, **kwargs):
+        pass
+
+    def print(self, *args, **kwargs):
+        pass
+
+
+def _reset_scraper(workdir, mock, args):
+    """Point job_scraper at the mock server with fresh caches in workdir"""
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    os.environ["RAPIDAPI_KEY"] = "mock-key"
+    os.environ["OPENAI_BASE_URL"] = f"{mock.url}/v1"
+    job_scraper.JSEARCH_URL = f"{mock.url}/search"
+    job_scraper.JSEARCH_MODE = "live"
+    job_scraper.JSEARCH_CACHE_TTL = 0
+    job_scraper.FETCH_RATE = args.fetch_rate
+    job_scraper.SCORE_CACHE_PATH = os.path.join(workdir, "score_cache.sqlite")
+    job_scraper.JOB_STORE_PATH = os.path.join(workdir, "jobs.sqlite")
+    job_scraper._client = None
+    job_scraper._session = None
+    job_scraper._score_cache = None
+    job_scraper._response_cache = None
+
+
+def run_once(size, args):
+    cities = [f"City {i}" for i in range(1, args.cities + 1)]
+    pages = max(1, math.ceil(size / (args.jobs_per_page * len(cities))))
+    mock = MockAPI(
+        jsearch=ServiceConfig(args.jsearch_latency, args.jsearch_latency / 4, args.error_rate, 0.0),
+        openai=ServiceConfig(args.openai_latency, args.openai_latency / 4, args.error_rate, args.throttle_rate),
+        jobs_per_page=args.jobs_per_page,
+    ).start()
+
+    timer = StageTimer()
+    timer.wrap("fetch page", "_search")
+    timer.wrap("score call", "_request_score")
+    timer.wrap("batch score call", "_request_batch_scores")
+    timer.wrap("write results", "write_results")
+
+    first_scored = []
+    fetched = [0]
+    start = time.perf_counter()
+
+    def progress(event, job):
+        if event == "fetched":
+            fetched[0] += 1
+        elif event == "scored" and not first_scored:
+            first_scored.append(time.perf_counter() - start)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            _reset_scraper(workdir, mock, args)
+            os.chdir(workdir)
+            if args.trace_memory:
+                tracemalloc.start()
+            df = job_scraper.run_search(
+                "Product Manager", cities, args.resume_text,
+                pages=pages, pipeline=args.pipeline, batch_size=args.batch_size,
+                dedup_threshold=args.dedup_threshold, progress=progress,
+            )
+            if args.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+            else:
+                # ru_maxrss is KiB on Linux; it is a process-wide high-water mark
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        finally:
+            if args.trace_memory:
+                tracemalloc.stop()
+            os.chdir(cwd)
+            timer.restore()
+            if job_scraper._score_cache is not None:
+                job_scraper._score_cache.close()
+            mock.stop()
+
+    elapsed = time.perf_counter() - start
+    stages = {
+        name: {"calls": len(s), "p50_ms": percentile(s, 50) * 1000, "p95_ms": percentile(s, 95) * 1000}
+        for name, s in timer.samples.items() if s
+    }
+    return {
+        # Whole pages per city can overshoot the requested size, so report what was actually fetched
+        "requested": size,
+        "postings": fetched[0],
+        "scored": int(df["Match %"].notna().sum()) if len(df) else 0,
+        "rows": len(df),
+        "seconds": elapsed,
+        "jobs_per_sec": len(df) / elapsed if elapsed else 0.0,
+        "first_scored_s": first_scored[0] if first_scored else None,
+        "peak_mb": peak / 1e6,
+        "mock_requests": dict(mock.counts),
+        "stages": stages,
+    }
+
+
+def print_report(result):
+    first = f"{result['first_scored_s']:.2f}s" if result["first_scored_s"] is not None else "-"
+    asked = f" (asked for {result['requested']})" if result["requested"] != result["postings"] else ""
+    print(f"\n== {result['postings']} postings{asked}: {result['rows']} rows ({result['scored']} scored) "
+          f"in {result['seconds']:.2f}s -> {result['jobs_per_sec']:.1f} jobs/sec, "
+          f"first scored {first}, peak {result['peak_mb']:.1f} MB")
+    print(f"   mock requests: {result['mock_requests']}")
+    for name, s in result["stages"].items():
+        print(f"   {name:<17} {s['calls']:>6} calls  p50 {s['p50_ms']:8.1f} ms  p95 {s['p95_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="synthetic posting counts to run (10 to 10000)")
+    parser.add_argument("--cities", type=int, default=3)
+    parser.add_argument("--jobs-per-page", type=int, default=10)
+    parser.add_argument("--pipeline", action="store_true", help="use the streaming fetch->score pipeline")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--dedup-threshold", type=float, default=0.8)
+    parser.add_argument("--fetch-rate", type=float, default=0, help="JSearch requests/sec; 0 = unlimited")
+    parser.add_argument("--jsearch-latency", type=float, default=0.3, help="mean seconds per JSearch page")
+    parser.add_argument("--openai-latency", type=float, default=0.2, help="mean seconds per chat completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of OpenAI requests answered with 429")
+    parser.add_argument("--resume", default="resume.txt")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="report peak Python heap via tracemalloc (slows the run ~3x) instead of peak RSS")
+    parser.add_argument("--verbose", action="store_true", help="show job_scraper's per-job log lines")
+    parser.add_argument("--json", dest="json_path", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.resume, "r") as f:
+        args.resume_text = f.read()
+    if not args.verbose:
+        # Per-job console output would dominate the timings at larger sizes
+        job_scraper.console = _SilentConsole()
+
+    results = []
+    for size in sorted(args.sizes):  # ascending, so the RSS high-water mark belongs to this size
+        result = run_once(size, args)
+        print_report(result)
+        results.append(result)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import hashlib
+import io
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import REGISTRY, record_usage
+from results_store import atomic_write_text
+
+MODEL = "gpt-4o-mini"
+PROMPT_VERSION = 1  # bump whenever build_prompt changes
+CACHE_DIR = os.getenv("COVER_LETTER_CACHE_DIR", ".cache/cover_letters")
+BATCH_CONCURRENCY = int(os.getenv("COVER_LETTER_CONCURRENCY", "4"))
+
+
+def build_prompt(resume_text, job_desc):
+    return f"""
+            You are a professional career writer.
+            Write a compelling, concise cover letter for the following job.
+            Use the applicant's resume and the job description below.
+            Make it confident, clear, and under 250 words.
+
+            === Resume ===
+            {resume_text}
+
+            === Job Description ===
+            {job_desc}
+
+            Format it properly with greetings, body, and closing.
+            """
+
+
+def _sha(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# --- LETTER CACHE ---
+class LetterCache:
+    """Generated letters stored as text files keyed by (resume hash, JD hash, model, prompt version)"""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(resume_text, job_desc, model=MODEL, prompt_version=PROMPT_VERSION):
+        return _sha(f"{_sha(resume_text)}\0{_sha(job_desc.strip())}\0{model}\0{prompt_version}")
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key[:32]}.txt")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            REGISTRY.inc("jobhunt_cache_requests_total", cache="cover_letter", result="miss")
+            return None
+        REGISTRY.inc("jobhunt_cache_requests_total", cache="cover_letter", result="hit")
+        return text
+
+    def put(self, key, text):
+        atomic_write_text(self._path(key), text)
+
+
+def _record(usage):
+    if usage is not None:
+        record_usage(MODEL, "cover_letter", usage.input_tokens or 0, usage.output_tokens or 0)
+
+
+# --- GENERATION ---
+def stream_letter(client, resume_text, job_desc, cache=None):
+    """Yield the letter as it is generated; a cached letter comes back in one piece"""
+    cache = cache or LetterCache()
+    key = cache.make_key(resume_text, job_desc)
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    start = time.perf_counter()
+    parts = []
+    with REGISTRY.timer("jobhunt_openai_request_seconds", op="cover_letter"):
+        stream = client.responses.create(model=MODEL, input=build_prompt(resume_text, job_desc), stream=True)
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                if not parts:
+                    REGISTRY.observe("jobhunt_cover_letter_first_token_seconds", time.perf_counter() - start,
+                                     help="Time until the first streamed cover-letter token")
+                parts.append(event.delta)
+                yield event.delta
+            elif event.type == "response.completed":
+                _record(event.response.usage)
+    if parts:
+        cache.put(key, "".join(parts))
+
+
+def generate_letter(client, resume_text, job_desc, cache=None):
+    """Whole letter in one call, served from the cache when the inputs are unchanged"""
+    cache = cache or LetterCache()
+    key = cache.make_key(resume_text, job_desc)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    with REGISTRY.timer("jobhunt_openai_request_seconds", op="cover_letter"):
+        response = client.responses.create(model=MODEL, input=build_prompt(resume_text, job_desc))
+    _record(response.usage)
+    cache.put(key, response.output_text)
+    return response.output_text
+
+
+def job_description(job):
+    """Job description text for a results row"""
+    return f"{job['Title']} at {job['Company']} ({job['Location']})\n\n{job.get('Description') or ''}"
+
+
+def generate_batch(client, resume_text, jobs, cache=None, concurrency=BATCH_CONCURRENCY, on_done=None):
+    """Letters for several jobs at once; returns [(job, letter or None, error or None)] in input order"""
+    cache = cache or LetterCache()
+
+    def one(job):
+        try:
+            return job, generate_letter(client, resume_text, job_description(job), cache), None
+        except Exception as e:
+            return job, None, e
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for result in executor.map(one, jobs):
+            results.append(result)
+            if on_done is not None:
+                on_done(len(results), len(jobs))
+    return results
+
+
+def _slug(text, limit=40):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")[:limit] or "job"
+
+
+def letters_zip(results):
+    """Zip of the generated letters, one text file per job"""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, (job, letter, _) in enumerate(results, start=1):
+            if letter:
+                zf.writestr(f"{i:02d}_{_slug(job['Company'])}_{_slug(job['Title'])}.txt", letter)
+    return buf.getvalue()
@@ -2,16 +2,34 @@ from openai import OpenAI
 import tempfile
 import streamlit as st
 import pandas as pd
-import subprocess
-import os, json, re
+import os, re, time
 import altair as alt
 import plotly.graph_objects as go
 import base64
+import functools
+from results_store import RESULTS_JOURNAL, results_version, read_results, tail_journal
+from run_coordinator import RunCoordinator
+from search_index import SEARCH_INDEX_PATH, SearchIndex
+from metrics import METRICS_JSONL_PATH, REGISTRY, read_last_jsonl, summarize_snapshot
+from cover_letters import stream_letter, generate_batch, letters_zip
 
 # ---------------------------
 # INIT
 # ---------------------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+@st.cache_resource
+def get_client():
+    # Built once per server process; a fresh client costs ~30 ms of TLS setup on every rerun
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+@st.cache_resource
+def get_coordinator():
+    # One per server process, shared by every browser session so identical searches run once
+    return RunCoordinator()
+
+
+client = get_client()
+coordinator = get_coordinator()
 st.set_page_config(page_title="Rachna's AI Assisted Job Hunt Agent", page_icon="💼", layout="wide")
 
 # ---------------------------
@@ -238,10 +256,16 @@ with st.sidebar.container():
 # ---------------------------
 # HEADER
 # ---------------------------
-if os.path.exists("profile.jpg"):
-    with open("profile.jpg", "rb") as img_file:
+@st.cache_data(show_spinner=False, max_entries=2)
+def profile_image_html(path, mtime):
+    """Base64 <img> tag for the profile photo, encoded once per file version"""
+    with open(path, "rb") as img_file:
         encoded_img = base64.b64encode(img_file.read()).decode()
-    img_html = f'<img src="data:image/jpeg;base64,{encoded_img}" alt="Profile Picture">'
+    return f'<img src="data:image/jpeg;base64,{encoded_img}" alt="Profile Picture">'
+
+
+if os.path.exists("profile.jpg"):
+    img_html = profile_image_html("profile.jpg", os.path.getmtime("profile.jpg"))
 else:
     img_html = '<div style="width:120px;height:120px;border-radius:50%;border:3px solid #4dd4ac;box-shadow:0 0 25px rgba(0,255,198,0.6);background:#0b0f19;display:flex;align-items:center;justify-content:center;color:#4dd4ac;">No<br>Image</div>'
 
@@ -261,97 +285,319 @@ st.markdown(f"""
 if fetch_jobs:
     if not uploaded_resume:
         st.error("❌ Please upload your resume to fetching jobs.")
+    elif "job_run" in st.session_state and st.session_state["job_run"].running:
+        st.warning("A search is already running.")
     else:
-        with st.spinner("📱 Fetching and scoring jobs..."):
-            os.environ["JOB_ROLE"] = selected_role
-            os.environ["JOB_CITIES"] = json.dumps(selected_cities)
-            subprocess.run(["python3", "job_scraper.py"])
-        st.success("✅ Done! CSV updated.")
+        try:
+            job_run, attached = coordinator.submit(selected_role, selected_cities, resume_text)
+        except RuntimeError as e:
+            st.warning(str(e))
+        else:
+            st.session_state["job_run"] = job_run
+            if attached:
+                st.info("🔗 Joined an identical search already in progress.")
+
+job_run = st.session_state.get("job_run")
+if job_run is not None:
+    if job_run.running:
+        st.info(f"📱 Fetching and scoring jobs… {job_run.fetched} fetched, {job_run.scored} scored ({job_run.elapsed:.0f}s)")
+        if st.button("✋ Cancel search"):
+            if not coordinator.detach(job_run):
+                # Other sessions are still watching this search, so only this one lets go of it
+                del st.session_state["job_run"]
+                st.rerun()
+        partial = job_run.partial_results()
+        if partial:
+            partial_df = pd.DataFrame(partial).sort_values("Match %", ascending=False, na_position="last")
+            cols = [c for c in ["Title", "Company", "Location", "Match %", "Link"] if c in partial_df.columns]
+            st.dataframe(partial_df[cols], use_container_width=True, hide_index=True)
+    else:
+        # Report the outcome once, then forget the finished run
+        if job_run.status == "done":
+            st.success(f"✅ Done! Scored {job_run.scored} jobs in {job_run.elapsed:.0f}s. CSV updated.")
+        elif job_run.status == "cancelled":
+            st.warning(f"Search cancelled after {job_run.scored} scored jobs; previous results kept.")
+        else:
+            st.error(f"⚠️ Search failed: {job_run.error}")
+        del st.session_state["job_run"]
+
+# ---------------------------
+# LIVE JOURNAL (searches started from the CLI)
+# ---------------------------
+def journal_first_line(path):
+    try:
+        with open(path, "rb") as f:
+            return f.readline()
+    except OSError:
+        return b""
+
+
+journal_live = False
+if not (job_run is not None and job_run.running) and os.path.exists(RESULTS_JOURNAL):
+    live = st.session_state.setdefault("journal", {"header": b"", "offset": 0, "jobs": {}, "complete": False})
+    first_line = journal_first_line(RESULTS_JOURNAL)
+    if first_line != live["header"]:
+        # A new run rewrote the journal: start reading it from the top
+        live.update(header=first_line, offset=0, jobs={}, complete=False)
+    header, entries, live["offset"] = tail_journal(RESULTS_JOURNAL, live["offset"])
+    live["complete"] = live["complete"] or bool(header and header.get("complete"))
+    for entry in entries:
+        live["jobs"][entry["key"]] = entry["job"]
+    # Only follow a journal that is still being written; an old unfinished one is a crashed run
+    journal_live = not live["complete"] and time.time() - os.path.getmtime(RESULTS_JOURNAL) < 120
+    if journal_live and live["jobs"]:
+        st.info(f"🛰️ A search is running elsewhere: {len(live['jobs'])} jobs scored so far")
+        live_df = pd.DataFrame(list(live["jobs"].values())).sort_values("Match %", ascending=False, na_position="last")
+        cols = [c for c in ["Title", "Company", "Location", "Match %", "Link"] if c in live_df.columns]
+        st.dataframe(live_df[cols].head(100), use_container_width=True, hide_index=True)
 
 # ---------------------------
 # LOAD JOB DATA
 # ---------------------------
-if os.path.exists("jobs_scored.csv"):
-    df = pd.read_csv("jobs_scored.csv")
-    filtered_df = df[df["Match %"] >= score_filter]
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_results(version):
+    """Parse results once per file version; sorted by Match % so filters are prefix slices.
+
+    Shared rather than copied per rerun (cache_data would unpickle every row each time),
+    so callers must treat the frame as read-only.
+    """
+    df = read_results(version[0])
+    df = df.sort_values("Match %", ascending=False, na_position="last", kind="stable")
+    if "Location" in df.columns:
+        df["Location"] = df["Location"].fillna("").astype(str).astype("category")  # cheap city facet masks
+    return df.reset_index(drop=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def aggregates(version):
+    """Gauge values for every whole-number threshold, computed in one pass per dataset version"""
+    import numpy as np
+
+    df = load_results(version)
+    scores = df["Match %"].to_numpy(dtype="float64", na_value=np.nan)
+    valid = scores[~np.isnan(scores)]
+    # Rows above each threshold form a prefix, so counts, averages and first-seen companies are prefix sums
+    counts = np.searchsorted(-valid, -np.arange(101), side="right")
+    sums = np.concatenate([[0.0], np.cumsum(valid)])
+    first_company = ~df["Company"].iloc[:len(valid)].duplicated().to_numpy()
+    companies = np.concatenate([[0], np.cumsum(first_company)])
+    return {
+        "total_jobs": counts,
+        "avg_match": np.where(counts > 0, sums[counts] / np.maximum(counts, 1), 0.0),
+        "unique_companies": companies[counts],
+        "cities": sorted(c for c in df["Location"].cat.categories if c) if "Location" in df.columns else [],
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def summarize(version, threshold):
+    """Gauge and chart aggregates for one dataset version and Match % threshold"""
+    agg = aggregates(version)
+    df = filter_by_match(load_results(version), threshold)
+    return {
+        "total_jobs": int(agg["total_jobs"][threshold]),
+        "avg_match": float(round(agg["avg_match"][threshold], 1)),
+        "unique_companies": int(agg["unique_companies"][threshold]),
+        "source_counts": df.groupby("Source").size().reset_index(name="Count") if "Source" in df.columns else None,
+        "location_counts": (df.groupby("Location", observed=True).size().reset_index(name="Count")
+                            if "Location" in df.columns else None),
+    }
+
+
+def filter_by_match(df, threshold):
+    # Rows are sorted descending with blanks last, so count the matches and slice
+    n = int((df["Match %"] >= threshold).sum())
+    return df.iloc[:n]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def result_rows(version, threshold, cities, sort_by, ascending):
+    """Row positions matching the filters, in display order"""
+    df = filter_by_match(load_results(version), threshold)
+    if cities:
+        df = df[df["Location"].isin(cities)]
+    if sort_by != "Match %" or ascending:
+        df = df.sort_values(sort_by, ascending=ascending, na_position="last", kind="stable")
+    return df.index.to_numpy()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def rows_csv(version, threshold, cities, sort_by, ascending):
+    df = load_results(version)
+    return df.loc[result_rows(version, threshold, cities, sort_by, ascending)].to_csv(index=False)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def gauges(total_jobs, avg_match, unique_companies):
+    """The three header gauges; rebuilt only when their values change"""
+    fig1 = go.Figure(go.Indicator(mode="gauge+number", value=total_jobs,
+        title={"text": "Total Jobs"},
+        gauge={"axis": {"range": [0, max(10, min(100, total_jobs+5))]},
+               "bar": {"color": "#4dd4ac"}}))
+    fig2 = go.Figure(go.Indicator(mode="gauge+number+delta", value=avg_match,
+        delta={"reference": 50},
+        title={"text": "Avg. Match %"},
+        gauge={"axis": {"range": [0, 100]}, "bar": {"color": "#00e6a8"}}))
+    fig3 = go.Figure(go.Indicator(mode="gauge+number", value=unique_companies,
+        title={"text": "Unique Companies"},
+        gauge={"axis": {"range": [0, max(5, min(50, unique_companies+2))]},
+               "bar": {"color": "#4dd4ac"}}))
+    return fig1, fig2, fig3
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def distribution_charts(version, threshold):
+    """Source and location charts for one dataset version and threshold"""
+    stats = summarize(version, threshold)
+    source_chart = loc_chart = None
+    if stats["source_counts"] is not None:
+        source_chart = (
+            alt.Chart(stats["source_counts"])
+            .mark_arc(innerRadius=50)
+            .encode(
+                theta=alt.Theta(field="Count", type="quantitative"),
+                color=alt.Color(field="Source", type="nominal", scale=alt.Scale(scheme="tealblues")),
+                tooltip=["Source", "Count"]
+            )
+            .properties(title="Jobs by Source")
+        )
+    if stats["location_counts"] is not None:
+        loc_chart = (
+            alt.Chart(stats["location_counts"])
+            .mark_bar()
+            .encode(
+                x=alt.X(
+                    "Count:Q",
+                    title="Number of Jobs",
+                    axis=alt.Axis(format=".0f", tickMinStep=1)
+                ),
+                y=alt.Y("Location:N", sort='-x'),
+                color="Location:N",
+                tooltip=["Location", "Count"]
+            )
+            .properties(title="Jobs by Location", height=300)
+        )
+    return source_chart, loc_chart
+
+
+results_key = results_version()
+if results_key:
+    df = load_results(results_key)
+    stats = summarize(results_key, score_filter)
 
     col1, col2, col3 = st.columns(3)
-    if not filtered_df.empty:
-        total_jobs = int(len(filtered_df))
-        avg_match = float(round(filtered_df["Match %"].mean(), 1))
-        unique_companies = int(filtered_df["Company"].nunique())
-
-        fig1 = go.Figure(go.Indicator(mode="gauge+number", value=total_jobs,
-            title={"text": "Total Jobs"},
-            gauge={"axis": {"range": [0, max(10, min(100, total_jobs+5))]},
-                   "bar": {"color": "#4dd4ac"}}))
+    if stats["total_jobs"]:
+        fig1, fig2, fig3 = gauges(stats["total_jobs"], stats["avg_match"], stats["unique_companies"])
         col1.plotly_chart(fig1, use_container_width=True)
-
-        fig2 = go.Figure(go.Indicator(mode="gauge+number+delta", value=avg_match,
-            delta={"reference": 50},
-            title={"text": "Avg. Match %"},
-            gauge={"axis": {"range": [0, 100]}, "bar": {"color": "#00e6a8"}}))
         col2.plotly_chart(fig2, use_container_width=True)
-
-        fig3 = go.Figure(go.Indicator(mode="gauge+number", value=unique_companies,
-            title={"text": "Unique Companies"},
-            gauge={"axis": {"range": [0, max(5, min(50, unique_companies+2))]},
-                   "bar": {"color": "#4dd4ac"}}))
         col3.plotly_chart(fig3, use_container_width=True)
     else:
         st.info("No jobs meet the current Match% filter.")
 
     st.subheader("📊 Job Distributions")
-    if not filtered_df.empty:
+    if stats["total_jobs"]:
         col1, col2 = st.columns(2)
 
-        with col1:
-            if "Source" in filtered_df.columns:
-                source_counts = filtered_df.groupby("Source").size().reset_index(name="Count")
-                source_chart = (
-                    alt.Chart(source_counts)
-                    .mark_arc(innerRadius=50)
-                    .encode(
-                        theta=alt.Theta(field="Count", type="quantitative"),
-                        color=alt.Color(field="Source", type="nominal", scale=alt.Scale(scheme="tealblues")),
-                        tooltip=["Source", "Count"]
-                    )
-                    .properties(title="Jobs by Source")
-                )
-                st.altair_chart(source_chart, use_container_width=True)
-
-        with col2:
-            if "Location" in filtered_df.columns:
-                loc_chart = (
-                    alt.Chart(filtered_df)
-                    .mark_bar()
-                    .encode(
-                        x=alt.X(
-                            "count():Q",
-                            title="Number of Jobs",
-                            axis=alt.Axis(format=".0f", tickMinStep=1)
-                        ),
-                        y=alt.Y("Location:N", sort='-x'),
-                        color="Location:N",
-                        tooltip=["Location", "count()"]
-                    )
-                    .properties(title="Jobs by Location", height=300)
-                )
-                st.altair_chart(loc_chart, use_container_width=True)  # ✅ inside the if block
+        source_chart, loc_chart = distribution_charts(results_key, score_filter)
+        if source_chart is not None:
+            col1.altair_chart(source_chart, use_container_width=True)
+        if loc_chart is not None:
+            col2.altair_chart(loc_chart, use_container_width=True)
 
         st.subheader("📋 Recommended Jobs")  # ✅ same indentation level
-        if not filtered_df.empty:
-            for city in filtered_df["Location"].unique():
-                st.markdown(f"### 🏦 Jobs in {city}")
-                city_df = filtered_df[filtered_df["Location"] == city].copy()
-                city_df.reset_index(drop=True, inplace=True)
-                city_df.index = city_df.index + 1
-                st.dataframe(city_df, use_container_width=True)
-
-            st.download_button("⬇️ Download CSV", data=filtered_df.to_csv(index=False), file_name="jobs_filtered.csv")
+        f1, f2, f3, f4 = st.columns([3, 2, 1, 1])
+        cities = tuple(f1.multiselect("🏙️ Cities", aggregates(results_key)["cities"], placeholder="All cities"))
+        sortable = [c for c in ["Match %", "Title", "Company", "Location", "Source"] if c in df.columns]
+        sort_by = f2.selectbox("Sort by", sortable)
+        ascending = f3.selectbox("Order", ["Desc", "Asc"]) == "Asc"
+        page_size = f4.selectbox("Rows", [25, 50, 100], index=1)
+
+        rows = result_rows(results_key, score_filter, cities, sort_by, ascending)
+        pages = max(1, -(-len(rows) // page_size))
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+        # Only the visible page is sent to the browser
+        page_df = df.loc[rows[(page - 1) * page_size:page * page_size]]
+        page_df.index = range((page - 1) * page_size + 1, (page - 1) * page_size + len(page_df) + 1)
+        st.caption(f"{len(rows):,} matching jobs")
+        st.dataframe(page_df, use_container_width=True)
+
+        # The CSV is only built when the button is clicked, not on every slider move
+        st.download_button("⬇️ Download CSV", data=functools.partial(rows_csv, results_key, score_filter, cities, sort_by, ascending),
+                           file_name="jobs_filtered.csv")
 else:
     st.info("No jobs found yet. Use the sidebar to fetch jobs.")
 
+# ---------------------------
+# SEARCH JOB HISTORY
+# ---------------------------
+@st.cache_resource
+def get_search_index():
+    # One connection per server process; the index reloads its facet columns itself after a run writes
+    return SearchIndex(SEARCH_INDEX_PATH)
+
+
+def facet_label(counts):
+    return lambda value: f"{value or 'Unknown'} ({counts.get(value, 0):,})"
+
+
+if os.path.exists(SEARCH_INDEX_PATH):
+    st.subheader("🔍 Search Job History")
+    index = get_search_index()
+    query = st.text_input("Search", placeholder='python "product roadmap" skill:sql -intern',
+                          help='Keywords, "exact phrases", skill:/title:/company: filters and -exclusions')
+    s1, s2, s3 = st.columns([2, 2, 1])
+    order = s3.selectbox("Order by", ["Match %", "Relevance"], key="search_order")
+    search_page_size = 50
+    signature = (query, score_filter, order, tuple(st.session_state.get("search_cities", [])),
+                 tuple(st.session_state.get("search_sources", [])))
+    if st.session_state.get("search_signature") != signature:
+        # A new search starts from its first page
+        st.session_state["search_signature"] = signature
+        st.session_state["search_page"] = 1
+    search_page = st.session_state["search_page"]
+    start = time.perf_counter()
+    found = index.search(query, score_filter, st.session_state.get("search_cities", []),
+                         st.session_state.get("search_sources", []), limit=search_page_size,
+                         offset=(search_page - 1) * search_page_size,
+                         order="relevance" if order == "Relevance" else "match")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    # Facet counts ignore their own selection, so every option shows what picking it would add
+    source_counts, city_counts = dict(found["facets"]["Source"]), dict(found["facets"]["Location"])
+    s1.multiselect("Sources", list(dict.fromkeys(list(source_counts) + st.session_state.get("search_sources", []))),
+                   key="search_sources", format_func=facet_label(source_counts), placeholder="All sources")
+    s2.multiselect("Cities", list(dict.fromkeys(list(city_counts) + st.session_state.get("search_cities", []))),
+                   key="search_cities", format_func=facet_label(city_counts), placeholder="All cities")
+
+    search_pages = max(1, -(-found["total"] // search_page_size))
+    st.number_input(f"Page (of {search_pages})", min_value=1, max_value=search_pages, key="search_page")
+    caption = f"{found['total']:,} of {index.count():,} indexed jobs at ≥ {score_filter}% match ({elapsed_ms:.0f} ms)"
+    if order == "Relevance" and found["order"] == "match":
+        caption += " · too many matches to rank by relevance, sorted by Match %"
+    st.caption(caption)
+    if found["rows"]:
+        st.dataframe(pd.DataFrame(found["rows"]), use_container_width=True, hide_index=True,
+                     column_config={"Link": st.column_config.LinkColumn("Link")})
+
+# ---------------------------
+# PIPELINE METRICS
+# ---------------------------
+# Live registry when a search ran in this process, otherwise the last CLI run's snapshot
+snapshot = REGISTRY.snapshot() if REGISTRY.counters or REGISTRY.histograms else read_last_jsonl(METRICS_JSONL_PATH)
+if snapshot:
+    with st.expander("📈 Pipeline Metrics"):
+        summary = summarize_snapshot(snapshot)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Prompt Tokens", f"{summary['prompt_tokens']:,}")
+        m2.metric("Completion Tokens", f"{summary['completion_tokens']:,}")
+        m3.metric("Est. Cost", f"${summary['cost_usd']:.4f}")
+        m4.metric("Retries / 429s", f"{summary['retries']} / {summary['throttled']}")
+        if summary["cache_hit_rates"]:
+            cols = st.columns(len(summary["cache_hit_rates"]))
+            for col, (cache, rate) in zip(cols, summary["cache_hit_rates"].items()):
+                col.metric(f"{cache} cache hit rate", f"{rate:.0%}")
+        if summary["latency"]:
+            st.dataframe(pd.DataFrame(summary["latency"]), use_container_width=True, hide_index=True)
+
 # ---------------------------
 # COVER LETTER GENERATOR
 # ---------------------------
@@ -373,26 +619,34 @@ if st.button("📨 Create Cover Letter"):
     elif not resume_text:
         st.warning("Please upload your resume first.")
     else:
-        with st.spinner("Crafting your personalized cover letter..."):
-            prompt = f"""
-            You are a professional career writer.
-            Write a compelling, concise cover letter for the following job.
-            Use the applicant's resume and the job description below.
-            Make it confident, clear, and under 250 words.
-
-            === Resume ===
-            {resume_text}
-
-            === Job Description ===
-            {job_desc}
-
-            Format it properly with greetings, body, and closing.
-            """
-            response = client.responses.create(model="gpt-4o-mini", input=prompt)
-
         st.markdown("### 📝 Your AI-Generated Cover Letter")
-        st.success(response.output_text)
-        st.download_button("⬇️ Download Cover Letter", data=response.output_text, file_name="Cover_Letter.txt")
+        # Streams token by token; an unchanged resume + description comes straight from the cache
+        letter = st.write_stream(stream_letter(client, resume_text, job_desc))
+        st.download_button("⬇️ Download Cover Letter", data=letter, file_name="Cover_Letter.txt")
+
+if results_key:
+    top_k = st.number_input("Letters for the top K matching jobs", min_value=1, max_value=50, value=5)
+    if st.button(f"🗂️ Create {top_k} Cover Letters"):
+        if not resume_text:
+            st.warning("Please upload your resume first.")
+        else:
+            top_jobs = filter_by_match(load_results(results_key), score_filter).head(int(top_k)).to_dict("records")
+            bar = st.progress(0.0, text="Writing cover letters...")
+            batch = generate_batch(client, resume_text, top_jobs,
+                                   on_done=lambda done, total: bar.progress(done / total, text=f"{done}/{total} letters"))
+            st.session_state["letter_batch"] = batch
+
+    batch = st.session_state.get("letter_batch")
+    if batch:
+        failed = [job["Title"] for job, letter, _ in batch if letter is None]
+        if failed:
+            st.warning(f"Could not write letters for: {', '.join(failed)}")
+        st.download_button("⬇️ Download Cover Letters (zip)", data=letters_zip(batch),
+                           file_name="Cover_Letters.zip", mime="application/zip")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+# Poll the background search (or a CLI run's journal) so progress keeps updating
+if (job_run is not None and job_run.running) or journal_live:
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,91 @@
+import re
+import zlib
+from collections import defaultdict
+
+NUM_PERM = 128
+BANDS = 32  # 4 rows per band: pairs above ~0.45 Jaccard usually become candidates
+SHINGLE = 3
+_PRIME = 4294967291  # largest prime below 2**32
+
+
+def _shingles(text):
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    if len(words) < SHINGLE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def _permutations(seed=1):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+def minhash(text, perms):
+    """MinHash signature of the text's word 3-gram set"""
+    import numpy as np
+    a, b = perms
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in _shingles(text)), dtype=np.uint64)
+    # (a*x + b) mod p for every permutation x shingle pair, then min per permutation
+    values = ((a[:, None] * hashes[None, :]) % _PRIME + b[:, None]) % _PRIME
+    return values.min(axis=1)
+
+
+def dedup_text(job):
+    return f"{job.get('Title', '')} {job.get('Company', '')} {job.get('Location', '')} {job.get('Description', '')}"
+
+
+# --- NEAR-DUPLICATE COLLAPSING ---
+class DuplicateIndex:
+    """Incremental MinHash LSH index; the first copy of a posting becomes canonical"""
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.perms = _permutations()
+        self.rows = NUM_PERM // BANDS
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        self.canonical = []
+        self.signatures = []
+        self.duplicates = 0
+
+    def add(self, job):
+        """Index job; return None if it is new, or the canonical job it duplicates"""
+        sig = minhash(dedup_text(job), self.perms)
+        keys = [sig[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(BANDS)]
+
+        # LSH: only postings sharing a whole band are compared
+        candidates = {i for band, key in enumerate(keys) for i in self.buckets[band].get(key, ())}
+        for i in sorted(candidates):
+            if (self.signatures[i] == sig).mean() >= self.threshold:
+                original = self.canonical[i]
+                original["Links"] = _join_unique(original["Links"].split(" | ") + [job.get("Link", "")])
+                original["Sources"] = _join_unique(original["Sources"].split(" | ") + [job.get("Source", "")])
+                original["Duplicates"] += 1
+                self.duplicates += 1
+                return original
+
+        job["Links"] = job.get("Link", "")
+        job["Sources"] = job.get("Source", "")
+        job["Duplicates"] = 0
+        for band, key in enumerate(keys):
+            self.buckets[band][key].append(len(self.canonical))
+        self.canonical.append(job)
+        self.signatures.append(sig)
+        return None
+
+
+def _join_unique(values):
+    seen = []
+    for v in values:
+        if v and v not in seen:
+            seen.append(v)
+    return " | ".join(seen)
+
+
+def dedup_stream(jobs, index):
+    """Pass through only postings that aren't near-duplicates of earlier ones"""
+    for job in jobs:
+        if index.add(job) is None:
+            yield job
@@ -0,0 +1,44 @@
+import hashlib
+import json
+import os
+import time
+
+from results_store import atomic_write_text
+
+
+# --- ON-DISK RESPONSE CACHE ---
+class ResponseCache:
+    """Raw JSearch responses stored as JSON files keyed by (query, page).
+
+    With a ttl (seconds) entries older than that are ignored; with ttl=None they
+    never expire, which is how record/replay recordings are kept.
+    """
+
+    def __init__(self, directory, ttl=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, query, page):
+        digest = hashlib.sha256(f"{query}\0{page}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, query, page):
+        """Cached response body for (query, page), or None"""
+        try:
+            with open(self._path(query, page), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.time() - entry["saved_at"] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["response"]
+
+    def put(self, query, page, response):
+        entry = {"query": query, "page": page, "saved_at": time.time(), "response": response}
+        atomic_write_text(self._path(query, page), json.dumps(entry))
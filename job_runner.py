@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+# --- BACKGROUND JOB RUN ---
+class JobRun:
+    """One job_scraper.run_search call on a background thread, with live progress and cancel"""
+
+    def __init__(self, role, locations, resume_text, **options):
+        self.role = role
+        self.locations = list(locations)
+        self.resume_text = resume_text
+        self.options = options
+        self.fetched = 0
+        self.scored = 0
+        self.results = []
+        self.status = "pending"  # pending, running, done, cancelled, failed
+        self.error = None
+        self.df = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started_at = time.time()
+        self.status = "running"
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        """Wait for the background thread to finish; True once it has"""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    @property
+    def elapsed(self):
+        end = self.finished_at or time.time()
+        return end - self.started_at if self.started_at else 0.0
+
+    def partial_results(self):
+        """Snapshot of the jobs scored so far"""
+        with self._lock:
+            return list(self.results)
+
+    def _progress(self, event, job):
+        with self._lock:
+            if event == "fetched":
+                self.fetched += 1
+            elif event == "scored":
+                self.scored += 1
+                self.results.append(dict(job))
+
+    def _run(self):
+        try:
+            import job_scraper
+            self.df = job_scraper.run_search(
+                self.role, self.locations, self.resume_text,
+                progress=self._progress, cancel=self._cancel, **self.options
+            )
+            self.status = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
@@ -1,120 +1,914 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from rich.console import Console
-from rich.table import Table
-import os, json, time, requests, pandas as pd
-from openai import OpenAI
+import os, json, time, queue, argparse, hashlib, sqlite3, threading
+from batch_scoring import BatchRun, chat_request
+from dedup import DuplicateIndex, dedup_stream
+from http_cache import ResponseCache
+from job_store import JobStore, job_key
+from metrics import BATCH_PRICE_FACTOR, METRICS_JSONL_PATH, METRICS_PROM_PATH, REGISTRY, record_usage
+from results_store import RESULTS_CSV, RESULTS_PARQUET, ResultsJournal, publish_results, write_results
+from prefilter import prefilter_jobs
+from prompt_compact import compact_job, estimate_tokens, resume_digest, resume_hash
+from rate_limit import RateLimiter
+from score_cache import ScoreCache
+from scoring_engine import AdaptiveScorer, ScoreFailed
+from search_index import SEARCH_INDEX_PATH, index_results
 
-console = Console()
+# Heavy dependencies (rich, requests, pandas, openai) are imported on first use so
+# that importing this module, --help and --dry-run stay fast and need no API keys.
+
+
+class _LazyConsole:
+    """rich Console created on first use"""
+    _console = None
+
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+
+console = _LazyConsole()
 
 # --- CONFIG ---
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
+MODEL = "gpt-4o-mini"
+PROMPT_VERSION = 2  # bump whenever the single or batch scoring prompt changes
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "800"))  # resume digest sent with every score
+JOB_TOKEN_BUDGET = int(os.getenv("JOB_TOKEN_BUDGET", "400"))  # compacted job description per posting
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH", "score_cache.sqlite")
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "50000"))
+SCORE_CACHE_MAX_AGE_DAYS = float(os.getenv("SCORE_CACHE_MAX_AGE_DAYS", "30"))
+
+JSEARCH_URL = "https://jsearch.p.rapidapi.com/search"
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "4"))
+FETCH_RATE = float(os.getenv("FETCH_RATE", "3"))  # JSearch requests per second
+JSEARCH_CACHE_DIR = os.getenv("JSEARCH_CACHE_DIR", ".cache/jsearch")
+JSEARCH_CACHE_TTL = float(os.getenv("JSEARCH_CACHE_TTL", "1800"))  # seconds; 0 disables
+JSEARCH_MODE = os.getenv("JSEARCH_MODE", "live")  # live, record or replay
+JSEARCH_RECORDINGS_DIR = os.getenv("JSEARCH_RECORDINGS_DIR", "recordings/jsearch")
+
+SCORE_INITIAL_CONCURRENCY = int(os.getenv("SCORE_INITIAL_CONCURRENCY", "5"))
+SCORE_MAX_CONCURRENCY = int(os.getenv("SCORE_MAX_CONCURRENCY", "16"))
+SCORE_TARGET_LATENCY = float(os.getenv("SCORE_TARGET_LATENCY", "8"))  # seconds
+SCORE_MAX_RETRIES = int(os.getenv("SCORE_MAX_RETRIES", "4"))
+SCORE_TIMEOUT = float(os.getenv("SCORE_TIMEOUT", "30"))
+SCORE_BATCH_SIZE = int(os.getenv("SCORE_BATCH_SIZE", "1"))  # jobs per request; 1 = one request per job
+
+BATCH_STATE_PATH = os.getenv("BATCH_STATE_PATH", ".cache/batch_state.json")  # in-flight Batch API job
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))  # seconds between status checks
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # estimated Jaccard similarity; 0 disables
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite")
+RESULTS_JOURNAL = os.getenv("RESULTS_JOURNAL", "jobs_scored.journal.jsonl")
+
+MATRIX_CSV = os.getenv("MATRIX_CSV", "matrix_scored.csv")
+MATRIX_PARQUET = os.getenv("MATRIX_PARQUET", "matrix_scored.parquet")
+
+PREFILTER_TOP_N = int(os.getenv("PREFILTER_TOP_N", "0")) or None  # only send the N most relevant jobs
+PREFILTER_MIN_SCORE = float(os.getenv("PREFILTER_MIN_SCORE")) if os.getenv("PREFILTER_MIN_SCORE") else None
+
+
+# --- CLIENTS ---
+_client = None
+_session = None
+_response_cache = None
+_recordings = None
+
+
+def _require_env(name):
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} is not set.")
+    return value
+
+
+def get_client():
+    """OpenAI client, created on first use"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=_require_env("OPENAI_API_KEY"))
+    return _client
+
 
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY is not set.")
-if not RAPIDAPI_KEY:
-    raise ValueError("RAPIDAPI_KEY is not set.")
+def get_session():
+    """Keep-alive session shared by all JSearch requests"""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, FETCH_CONCURRENCY))
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+        _session.headers.update({
+            "X-RapidAPI-Key": _require_env("RAPIDAPI_KEY"),
+            "X-RapidAPI-Host": "jsearch.p.rapidapi.com"
+        })
+    return _session
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+def get_response_cache():
+    """TTL cache of raw JSearch pages, or None when JSEARCH_CACHE_TTL is 0"""
+    global _response_cache
+    if _response_cache is None and JSEARCH_CACHE_TTL > 0:
+        _response_cache = ResponseCache(JSEARCH_CACHE_DIR, ttl=JSEARCH_CACHE_TTL)
+    return _response_cache
+
+
+def get_recordings():
+    """Non-expiring store of raw JSearch pages for record/replay mode"""
+    global _recordings
+    if _recordings is None:
+        _recordings = ResponseCache(JSEARCH_RECORDINGS_DIR)
+    return _recordings
 
 
 # --- JOB SCRAPING FUNCTION ---
-def fetch_jobs(role="Product Manager", locations=["Los Angeles"], pages=1):
-    """Fetch jobs from RapidAPI JSearch"""
-    url = "https://jsearch.p.rapidapi.com/search"
-    headers = {
-        "X-RapidAPI-Key": RAPIDAPI_KEY,
-        "X-RapidAPI-Host": "jsearch.p.rapidapi.com"
+def _search(limiter, query, page):
+    """Raw JSearch response for one page: replayed, cached, or fetched live"""
+    if JSEARCH_MODE == "replay":
+        data = get_recordings().get(query, page)
+        REGISTRY.inc("jobhunt_cache_requests_total", cache="jsearch_replay", result="miss" if data is None else "hit")
+        if data is None:
+            raise LookupError(f"no recording for {query!r} page {page}")
+        return data
+
+    cache = get_response_cache()
+    data = cache.get(query, page) if cache else None
+    if cache:
+        REGISTRY.inc("jobhunt_cache_requests_total", help="Cache lookups by cache and result",
+                     cache="jsearch", result="miss" if data is None else "hit")
+    if data is not None:
+        if JSEARCH_MODE == "record":
+            # A cached page is the same raw response; record it too so replay has every page
+            get_recordings().put(query, page, data)
+        return data
+
+    params = {
+        "query": query,
+        "page": str(page),
+        "num_pages": "1"
     }
-    all_jobs = []
+    limiter.acquire()
+    with REGISTRY.timer("jobhunt_fetch_page_seconds"):
+        r = get_session().get(JSEARCH_URL, params=params, timeout=20)
+    REGISTRY.inc("jobhunt_fetch_requests_total", help="JSearch requests by HTTP status", status=r.status_code)
+    r.raise_for_status()
+    data = r.json()
+    if cache:
+        cache.put(query, page, data)
+    if JSEARCH_MODE == "record":
+        get_recordings().put(query, page, data)
+    return data
 
-    for location in locations:
-        for page in range(1, pages + 1):
-            params = {
-                "query": f"{role} in {location}",
-                "page": str(page),
-                "num_pages": "1"
-            }
+
+def _parse_job(job, location):
+    return {
+        "Job ID": job.get("job_id", ""),
+        "Title": job.get("job_title", ""),
+        "Company": job.get("employer_name", ""),
+        "Location": job.get("job_city", location),
+        "Link": job.get("job_apply_link", "") or job.get("job_google_link", ""),
+        "Description": job.get("job_description", ""),
+        "Source": job.get("job_publisher", "")
+    }
+
+
+def _fetch_page(limiter, role, location, page, cancel=None):
+    """Fetch one JSearch results page and return its parsed jobs"""
+    if cancel is not None and cancel.is_set():
+        return []
+    console.log(f"[cyan]Fetching {role} in {location} (page {page})[/cyan]")
+    data = _search(limiter, f"{role} in {location}", page)
+    return [_parse_job(job, location) for job in data.get("data", [])]
+
+
+def iter_job_pages(role, locations, pages=1, concurrency=None, rate=None, cancel=None):
+    """Fetch every location x page concurrently, yielding (location, page, jobs) as they finish"""
+    for _, location, page, jobs in iter_query_pages([role], locations, pages, concurrency, rate, cancel):
+        yield location, page, jobs
+
+
+def iter_query_pages(roles, locations, pages=1, concurrency=None, rate=None, cancel=None):
+    """Fetch every role x location x page through one pool and rate limiter, yielding (role, location, page, jobs)"""
+    limiter = RateLimiter(rate if rate is not None else FETCH_RATE, burst=concurrency or FETCH_CONCURRENCY)
+    tasks = [(role, location, page) for role in roles for location in locations for page in range(1, pages + 1)]
+
+    with ThreadPoolExecutor(max_workers=concurrency or FETCH_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(_fetch_page, limiter, role, location, page, cancel): (role, location, page)
+            for role, location, page in tasks
+        }
+        for future in as_completed(futures):
+            role, location, page = futures[future]
             try:
-                console.log(f"[cyan]Fetching {role} in {location} (page {page})[/cyan]")
-                r = requests.get(url, headers=headers, params=params, timeout=20)
-                r.raise_for_status()
-                data = r.json()
-                for job in data.get("data", []):
-                    all_jobs.append({
-                        "Title": job.get("job_title", ""),
-                        "Company": job.get("employer_name", ""),
-                        "Location": job.get("job_city", location),
-                        "Link": job.get("job_apply_link", "") or job.get("job_google_link", ""),
-                        "Description": job.get("job_description", "")[:2000],
-                        "Source": job.get("job_publisher", "")
-                    })
-                time.sleep(0.3)
+                jobs = future.result()
             except Exception as e:
-                console.log(f"[red]⚠️ Error fetching {location} page {page}: {e}[/red]")
-                continue
+                console.log(f"[red]⚠️ Error fetching {role} in {location} page {page}: {e}[/red]")
+                REGISTRY.inc("jobhunt_fetch_errors_total", help="JSearch pages that could not be fetched")
+                jobs = []
+            yield role, location, page, jobs
+
+
+def fetch_jobs(role="Product Manager", locations=["Los Angeles"], pages=1, concurrency=None, rate=None, cancel=None,
+               progress=None):
+    """Fetch jobs from RapidAPI JSearch; progress, if given, gets ("fetched", job) as each page lands"""
+    results = {}
+    for location, page, jobs in iter_job_pages(role, locations, pages, concurrency, rate, cancel):
+        results[(location, page)] = jobs
+        if progress is not None:
+            for job in jobs:
+                progress("fetched", job)
+
+    # Keep the location/page order of the sequential fetch
+    all_jobs = []
+    for location in locations:
+        for page in range(1, pages + 1):
+            all_jobs.extend(results.get((location, page), []))
 
     console.log(f"[green]✅ Fetched {len(all_jobs)} jobs total[/green]")
     return all_jobs
 
 
 # --- SCORING FUNCTION ---
-def score_job(resume_text, job_text):
-    """Score job-resume match using OpenAI GPT-4o"""
+def score_request(resume_text, job_text):
+    """Chat-completions body asking for a single 0-100 score"""
     prompt = (
         "Rate how well this resume matches the job from 0 to 100. "
         "Only output a single integer number.\n\n"
         f"Resume:\n{resume_text}\n\nJob:\n{job_text}\n"
     )
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
+    return {"model": MODEL, "messages": [{"role": "user", "content": prompt}], "temperature": 0}
+
+
+def parse_score(content):
+    """Integer score from a reply; raises ScoreFailed if the reply isn't an integer"""
+    result = (content or "").strip()
+    if not result.isdigit():
+        raise ScoreFailed(f"unexpected reply {result[:40]!r}")
+    return int(result)
+
+
+def _request_score(resume_text, job_text):
+    """Ask the model for a score; raises ScoreFailed if the reply isn't an integer"""
+    # Retries and backoff are owned by the scoring engine
+    with REGISTRY.timer("jobhunt_openai_request_seconds", op="score"):
+        resp = get_client().with_options(max_retries=0, timeout=SCORE_TIMEOUT).chat.completions.create(
+            **score_request(resume_text, job_text)
+        )
+    _record_usage(resp, "score")
+    return parse_score(resp.choices[0].message.content)
+
+
+def _request_batch_scores(resume_text, job_texts):
+    """Score several jobs in one request; entries that come back malformed are None"""
+    jobs_block = "\n\n".join(f"### Job {i}\n{text}" for i, text in enumerate(job_texts, start=1))
+    prompt = (
+        "Rate how well this resume matches each job below from 0 to 100. "
+        'Respond with JSON of the form {"scores": [{"id": <job number>, "score": <integer>}]} '
+        "containing exactly one entry per job.\n\n"
+        f"Resume:\n{resume_text}\n\nJobs:\n{jobs_block}\n"
+    )
+    with REGISTRY.timer("jobhunt_openai_request_seconds", op="batch_score"):
+        resp = get_client().with_options(max_retries=0, timeout=SCORE_TIMEOUT).chat.completions.create(
+            model=MODEL,
             messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
             temperature=0
         )
-        result = resp.choices[0].message.content.strip()
-        return int(result) if result.isdigit() else 0
-    except Exception as e:
-        console.log(f"[red]Error scoring job: {e}[/red]")
-        return 0
+    _record_usage(resp, "batch_score")
+    return parse_batch_scores(resp.choices[0].message.content, len(job_texts))
+
+
+def parse_batch_scores(content, count):
+    """Validate a batch reply, returning one score or None per job"""
+    scores = [None] * count
+    try:
+        entries = json.loads(content).get("scores", [])
+    except (ValueError, AttributeError, TypeError):
+        # Also a reply with no content at all (content is None, e.g. a refusal)
+        return scores
+    if not isinstance(entries, list):
+        return scores
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        idx, score = entry.get("id"), entry.get("score")
+        if (isinstance(idx, int) and 1 <= idx <= count and scores[idx - 1] is None
+                and isinstance(score, int) and not isinstance(score, bool) and 0 <= score <= 100):
+            scores[idx - 1] = score
+    return scores
+
+
+# --- TOKEN ACCOUNTING ---
+def _record_usage(resp, op):
+    u = getattr(resp, "usage", None)
+    record_usage(MODEL, op, getattr(u, "prompt_tokens", 0) or 0, getattr(u, "completion_tokens", 0) or 0)
+
+
+def job_text(job):
+    """Text sent to the model for a job posting: its salient sections within JOB_TOKEN_BUDGET"""
+    return f"{job['Title']} at {job['Company']} in {job['Location']}.\n{compact_job(job['Description'], JOB_TOKEN_BUDGET)}"
+
+
+def score_key(resume_text, job, text=None):
+    """Cache key over exactly what the model sees, so budget changes invalidate old scores"""
+    digest = resume_digest(resume_text, RESUME_TOKEN_BUDGET)
+    return ScoreCache.make_key(digest, text if text is not None else job_text(job), MODEL, PROMPT_VERSION)
+
+
+_score_cache = None
+
+
+def get_score_cache():
+    """Shared on-disk score cache, opened on first use"""
+    global _score_cache
+    if _score_cache is None:
+        _score_cache = ScoreCache(
+            SCORE_CACHE_PATH,
+            max_entries=SCORE_CACHE_MAX_ENTRIES,
+            max_age_days=SCORE_CACHE_MAX_AGE_DAYS,
+        )
+    return _score_cache
+
+
+def make_scorer(stop=None):
+    return AdaptiveScorer(
+        initial=SCORE_INITIAL_CONCURRENCY,
+        max_limit=SCORE_MAX_CONCURRENCY,
+        target_latency=SCORE_TARGET_LATENCY,
+        max_retries=SCORE_MAX_RETRIES,
+        log=console.log,
+        stop=stop,
+    )
+
+
+def _mark_scored(job, score):
+    job["Match %"] = score
+    job["Score Status"] = "scored"
+
+
+def _mark_failed(job):
+    job["Match %"] = None
+    job["Score Status"] = "failed"
+
+
+def _mark_prefiltered(job):
+    job["Match %"] = None
+    job["Score Status"] = "prefiltered"
 
 
 # --- PARALLEL SCORING FUNCTION ---
-def score_all_jobs(jobs, resume_text):
-    """Score jobs concurrently for faster execution"""
-    scored_jobs = []
-    total = len(jobs)
-    console.log(f"[bold yellow]Scoring {total} jobs using 5 threads...[/bold yellow]")
+def _score_units(jobs, resume_text, cache, batch_size):
+    """Split jobs into cache hits and request-sized groups of misses"""
+    pending = []
+    for job in jobs:
+        text = job_text(job)
+        key = score_key(resume_text, job, text)
+        score = cache.get(key)
+        REGISTRY.inc("jobhunt_cache_requests_total", cache="score", result="miss" if score is None else "hit")
+        if score is not None:
+            yield [(job, key, text)], score
+            continue
+        pending.append((job, key, text))
+        if len(pending) >= batch_size:
+            yield pending, None
+            pending = []
+    if pending:
+        yield pending, None
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {
-            executor.submit(
-                score_job,
-                resume_text,
-                f"{j['Title']} at {j['Company']} in {j['Location']}.\n{j['Description']}"
-            ): j for j in jobs
-        }
 
-        for i, future in enumerate(as_completed(futures), start=1):
-            job = futures[future]
+def score_stream(jobs, resume_text, cache=None, batch_size=None, cancel=None):
+    """Score jobs from any iterable as they arrive, yielding each job once it has a score"""
+    cache = cache or get_score_cache()
+    batch_size = max(1, batch_size or SCORE_BATCH_SIZE)
+    scorer = make_scorer(stop=cancel)
+    digest = resume_digest(resume_text, RESUME_TOKEN_BUDGET)
+    console.log(f"[cyan]📝 Resume digest: {estimate_tokens(resume_text)} -> {estimate_tokens(digest)} tokens[/cyan]")
+
+    def score_single(key, text):
+        try:
+            score = scorer.call(_request_score, digest, text)
+        except Exception as e:
+            return None, e
+        cache.put(key, score)
+        return score, None
+
+    def score_unit(unit):
+        group, cached = unit
+        if cached is not None:
+            return [(group[0][0], cached, None)]
+        if len(group) == 1:
+            job, key, text = group[0]
+            return [(job, *score_single(key, text))]
+        scores = scorer.call(_request_batch_scores, digest, [text for _, _, text in group])
+        results = []
+        for (job, key, text), score in zip(group, scores):
+            if score is None:
+                # Malformed or missing entry: fall back to scoring this job on its own
+                results.append((job, *score_single(key, text)))
+            else:
+                cache.put(key, score)
+                results.append((job, score, None))
+        return results
+
+    failed = 0
+    done = 0
+    start = time.monotonic()
+    tokens_before = REGISTRY.total("jobhunt_openai_tokens_total")
+    for unit, results, unit_error in scorer.map_unordered(score_unit, _score_units(jobs, resume_text, cache, batch_size)):
+        if unit_error is not None:
+            results = [(job, None, unit_error) for job, _, _ in unit[0]]
+        for job, score, error in results:
+            done += 1
+            if error is None:
+                _mark_scored(job, score)
+            else:
+                _mark_failed(job)
+                failed += 1
+                console.log(f"[red]⚠️ Scoring failed for {job['Title']}[/red]: {error}")
+            REGISTRY.inc("jobhunt_jobs_total", help="Jobs by final score status", status=job["Score Status"])
+            console.log(f"[green]Scored {done}[/green] - {job['Title']}")
+            yield job
+
+    cache.evict()
+    stats = cache.stats()
+    elapsed = time.monotonic() - start
+    tokens = REGISTRY.total("jobhunt_openai_tokens_total") - tokens_before
+    REGISTRY.inc("jobhunt_score_retries_total", scorer.retries, help="Scoring calls retried after a transient error")
+    REGISTRY.inc("jobhunt_score_throttled_total", scorer.throttled, help="Scoring calls rejected with 429")
+    console.log(
+        f"[green]✅ Completed scoring[/green] ({stats['hits']} cache hits, {stats['misses']} misses, "
+        f"{failed} failed, {scorer.retries} retries, {scorer.throttled} rate-limited)"
+    )
+    if done:
+        console.log(
+            f"[cyan]Batch size {batch_size}: {tokens / done:.0f} tokens/job, "
+            f"{done / elapsed if elapsed else 0:.2f} jobs/sec[/cyan]"
+        )
+
+
+# --- OFFLINE BATCH API SCORING ---
+def _collect_batch(batch, status, cache):
+    """Cache the scores of a finished batch; returns {score key: (score or None, error or None)}"""
+    results = batch.results() if status == "completed" else {}
+    if status != "completed":
+        console.log(f"[red]⚠️ Batch ended as {status}[/red]")
+    scores = {}
+    for key, (content, usage, error) in results.items():
+        if usage:
+            record_usage(MODEL, "batch_api", usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                         price_factor=BATCH_PRICE_FACTOR)
+        score = None
+        try:
+            score = parse_score(content) if error is None else None
+        except ScoreFailed as e:
+            error = e
+        if score is not None:
+            cache.put(key, score)
+        scores[key] = (score, error)
+    return scores
+
+
+def score_batch_api(jobs, resume_text, cache=None, cancel=None, poll_interval=None):
+    """Score jobs through the OpenAI Batch API: half price, no rate-limit fights, minutes-to-hours latency.
+
+    A submitted batch is remembered in BATCH_STATE_PATH; after a restart its
+    results are collected into the score cache first (custom ids are score
+    keys), and only the jobs still unscored go into a new batch. Returns the
+    jobs marked like score_stream's output.
+    """
+    cache = cache or get_score_cache()
+    poll_interval = poll_interval or BATCH_POLL_INTERVAL
+    batch = BatchRun(get_client(), BATCH_STATE_PATH, log=console.log)
+    if batch.resume():
+        # Already paid for, even if the postings changed since: merge it before submitting anything new
+        status = batch.wait(poll_interval, cancel)
+        if status is None:
+            console.log("[yellow]Stopped waiting; rerun to pick the batch up again[/yellow]")
+            return []
+        _collect_batch(batch, status, cache)
+        batch.finish()
+
+    digest = resume_digest(resume_text, RESUME_TOKEN_BUDGET)
+    pending = {}  # score key -> jobs sharing it
+    requests = []
+    done = []
+    for job in jobs:
+        text = job_text(job)
+        key = score_key(resume_text, job, text)
+        score = cache.get(key)
+        REGISTRY.inc("jobhunt_cache_requests_total", cache="score", result="miss" if score is None else "hit")
+        if score is not None:
+            _mark_scored(job, score)
+            done.append(job)
+            continue
+        if key not in pending:
+            requests.append(chat_request(key, score_request(digest, text)))
+        pending.setdefault(key, []).append(job)
+
+    if requests:
+        batch.submit(requests)
+        status = batch.wait(poll_interval, cancel)
+        if status is None:
+            console.log("[yellow]Stopped waiting; rerun to pick the batch up again[/yellow]")
+            return done
+        scores = _collect_batch(batch, status, cache)
+        for key, group in pending.items():
+            score, error = scores.get(key, (None, "no result in batch output"))
+            for job in group:
+                if score is not None:
+                    _mark_scored(job, score)
+                else:
+                    _mark_failed(job)
+                    console.log(f"[red]⚠️ Scoring failed for {job['Title']}[/red]: {error}")
+                done.append(job)
+        batch.finish()
+
+    for job in done:
+        REGISTRY.inc("jobhunt_jobs_total", help="Jobs by final score status", status=job["Score Status"])
+    console.log(f"[green]✅ Batch scoring done: {len(done)} jobs, {len(requests)} sent to the Batch API[/green]")
+    return done
+
+
+# --- STREAMING PIPELINE ---
+_END = object()
+
+
+def stream_jobs(role, locations, pages=1, cancel=None):
+    """Fetch in a background thread, yielding jobs through a bounded queue as pages land"""
+    q = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stopped = threading.Event()  # the consumer has gone away
+
+    def gone():
+        return stopped.is_set() or (cancel is not None and cancel.is_set())
+
+    def put(item):
+        # Never block for good on a full queue that nobody reads any more
+        while not gone():
             try:
-                job["Match %"] = future.result()
-            except Exception as e:
-                job["Match %"] = 0
-                console.log(f"[red]⚠️ Scoring failed for {job['Title']}[/red]: {e}")
-            scored_jobs.append(job)
-            console.log(f"[green]Scored {i}/{total}[/green] - {job['Title']}")
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for _, _, jobs in iter_job_pages(role, locations, pages, cancel=cancel):
+                for job in jobs:
+                    if not put(job):
+                        return
+        finally:
+            put(_END)
+
+    threading.Thread(target=produce, daemon=True).start()
+    count = 0
+    try:
+        while not gone():
+            try:
+                job = q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if job is _END:
+                break
+            count += 1
+            yield job
+    finally:
+        stopped.set()
+    console.log(f"[green]✅ Fetched {count} jobs total[/green]")
+
+
+def pipeline_jobs(role, locations, resume_text, pages=1, cache=None, batch_size=None, dedup=None,
+                  store=None, delta=False, cancel=None, progress=None, journal=None, resumed=None):
+    """Overlap fetching and scoring: yields scored jobs while later pages are still loading"""
+    jobs = stream_jobs(role, locations, pages, cancel)
+    if progress is not None:
+        jobs = _report(jobs, progress, "fetched")
+    if dedup is not None:
+        jobs = dedup_stream(jobs, dedup)
+    if store is not None:
+        jobs = observe_stream(jobs, store, resume_text, delta)
+    if journal is not None:
+        jobs = journal_stream(jobs, journal, resumed if resumed is not None else [])
+    return score_stream(jobs, resume_text, cache, batch_size, cancel)
+
+
+def _report(jobs, progress, event):
+    for job in jobs:
+        progress(event, job)
+        yield job
+
+
+# --- RESUMABLE RUNS ---
+def run_fingerprint(role, locations, pages, resume_text, prefilter_top=None, prefilter_min=None):
+    """Identity of a run's inputs; a journal is only resumed by a run with the same one"""
+    # The pre-filter settings decide which journalled "prefiltered" rows count as finished
+    parts = [role, sorted(locations), pages, resume_hash(resume_text), MODEL, PROMPT_VERSION,
+             prefilter_top, prefilter_min]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def journal_stream(jobs, journal, resumed):
+    """Pass on jobs the journal hasn't finished; collect the journalled results of the rest"""
+    for job in jobs:
+        done = journal.done(job_key(job))
+        if done is None:
+            yield job
+        else:
+            resumed.append(done)
+
 
-    console.log(f"[green]✅ Completed scoring {len(scored_jobs)} jobs[/green]")
-    return scored_jobs
+# --- INCREMENTAL DELTA RUNS ---
+def observe_stream(jobs, store, resume_text, delta=False):
+    """Record every posting in the job store; in delta mode pass on only new or changed ones"""
+    now = time.time()
+    for job in jobs:
+        store.observe(job, now)
+        if not delta or store.needs_scoring(job, score_key(resume_text, job)):
+            yield job
+
+
+def save_to_store(store, jobs, resume_text):
+    for job in jobs:
+        done = job.get("Score Status") in ("scored", "prefiltered")
+        store.save_result(job, score_key(resume_text, job) if done else None)
 
 
 # --- MAIN FUNCTION ---
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch job postings and score them against resume.txt")
+    parser.add_argument("--pages", type=int, default=1, help="result pages to fetch per city")
+    parser.add_argument("--pipeline", action="store_true", default=os.getenv("JOB_PIPELINE") == "1",
+                        help="score postings while fetching instead of after (env JOB_PIPELINE=1)")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="collapse postings at least this similar before scoring; 0 disables (env DEDUP_THRESHOLD)")
+    parser.add_argument("--prefilter-top", type=int, default=PREFILTER_TOP_N,
+                        help="only send the N most lexically relevant jobs to the model (env PREFILTER_TOP_N)")
+    parser.add_argument("--prefilter-min", type=float, default=PREFILTER_MIN_SCORE,
+                        help="skip jobs whose relative BM25 relevance is below this 0-1 value (env PREFILTER_MIN_SCORE)")
+    parser.add_argument("--delta", action="store_true",
+                        help="only score postings not already scored in the job store and merge with earlier results")
+    parser.add_argument("--expire-days", type=float, default=None,
+                        help="drop stored postings not seen for this many days")
+    parser.add_argument("--batch-size", type=int, default=SCORE_BATCH_SIZE,
+                        help="jobs scored per OpenAI request (env SCORE_BATCH_SIZE)")
+    parser.add_argument("--batch-api", action="store_true",
+                        help="score through the OpenAI Batch API (half price, may take hours; rerun to resume waiting)")
+    parser.add_argument("--jsearch-mode", choices=["live", "record", "replay"], default=JSEARCH_MODE,
+                        help="record raw JSearch responses to disk, or replay them offline (env JSEARCH_MODE)")
+    parser.add_argument("--resumes", nargs="+", metavar="FILE",
+                        help="matrix mode: score each of these resumes against every role")
+    parser.add_argument("--roles", nargs="+", metavar="ROLE",
+                        help="matrix mode: search each of these roles (default JOB_ROLE)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the resolved search settings and exit without calling any API")
+    return parser.parse_args(argv)
+
+
+def run_search(role, locations, resume_text, pages=1, pipeline=False, batch_size=None,
+               dedup_threshold=DEDUP_THRESHOLD, prefilter_top=PREFILTER_TOP_N, prefilter_min=PREFILTER_MIN_SCORE,
+               delta=False, expire_days=None, batch_api=False, output_dir=None, progress=None, cancel=None):
+    """Fetch, score and save jobs in-process; returns the results DataFrame sorted by Match %.
+
+    progress, if given, is called as progress(event, job) with event "fetched" or
+    "scored". Setting the cancel event stops the run early without saving results.
+    With output_dir, the journal and results are written there first and then
+    swapped in as the shared results, so concurrent runs never interleave files.
+    """
+    progress = progress or (lambda event, job: None)
+    start = time.monotonic()
+    dedup = DuplicateIndex(dedup_threshold) if dedup_threshold > 0 else None
+    store = JobStore(JOB_STORE_PATH)
+    prefiltering = prefilter_top or prefilter_min is not None
+    if pipeline and batch_api:
+        console.log("[yellow]Batch API scoring waits for the whole batch; ignoring --pipeline[/yellow]")
+        pipeline = False
+    if pipeline and prefiltering:
+        console.log("[yellow]Pre-filter needs the full result set; ignoring it in --pipeline mode[/yellow]")
+        prefilter_top, prefilter_min = None, None
+    # Every finished job is appended here first, so a crash or Ctrl-C loses nothing already scored
+    journal_path = os.path.join(output_dir, os.path.basename(RESULTS_JOURNAL)) if output_dir else RESULTS_JOURNAL
+    journal = ResultsJournal(run_fingerprint(role, locations, pages, resume_text, prefilter_top or None, prefilter_min),
+                             journal_path)
+    resumed = []
+    if journal.resumed:
+        console.log(f"[cyan]↩️ Resuming an interrupted run: {len(journal.records)} jobs already journalled[/cyan]")
+    if pipeline:
+        scored = []
+        with REGISTRY.timer("jobhunt_stage_seconds", stage="fetch+score"):
+            for job in pipeline_jobs(role, locations, resume_text, pages=pages, batch_size=batch_size, dedup=dedup,
+                                     store=store, delta=delta, cancel=cancel, progress=progress,
+                                     journal=journal, resumed=resumed):
+                if not scored:
+                    console.log(f"[cyan]First scored job after {time.monotonic() - start:.1f}s[/cyan]")
+                journal.append(job_key(job), job)
+                scored.append(job)
+                progress("scored", job)
+    else:
+        with REGISTRY.timer("jobhunt_stage_seconds", stage="fetch"):
+            jobs = fetch_jobs(role, locations, pages=pages, cancel=cancel, progress=progress)
+        if dedup is not None:
+            jobs = dedup_stream(jobs, dedup)
+        jobs = list(journal_stream(observe_stream(jobs, store, resume_text, delta), journal, resumed))
+        jobs, skipped = prefilter_jobs(jobs, resume_text, job_text, prefilter_top, prefilter_min)
+        for job in skipped:
+            _mark_prefiltered(job)
+            journal.append(job_key(job), job)
+            REGISTRY.inc("jobhunt_jobs_total", status="prefiltered")
+        if skipped:
+            console.log(f"[cyan]Pre-filter skipped {len(skipped)} low-relevance jobs[/cyan]")
+        scored = skipped
+        with REGISTRY.timer("jobhunt_stage_seconds", stage="score"):
+            if batch_api:
+                console.log(f"[bold yellow]Scoring {len(jobs)} jobs through the Batch API...[/bold yellow]")
+                results = score_batch_api(jobs, resume_text, cancel=cancel) if jobs else []
+            else:
+                console.log(f"[bold yellow]Scoring {len(jobs)} jobs (adaptive concurrency, up to {SCORE_MAX_CONCURRENCY})...[/bold yellow]")
+                results = score_stream(jobs, resume_text, batch_size=batch_size, cancel=cancel) if jobs else []
+            for job in results:
+                journal.append(job_key(job), job)
+                scored.append(job)
+                progress("scored", job)
+    for job in resumed:
+        progress("scored", job)
+    if resumed:
+        console.log(f"[cyan]Reused {len(resumed)} results from the journal[/cyan]")
+    save_to_store(store, scored + resumed, resume_text)
+    console.log(f"[cyan]Fetched and scored {len(scored)} jobs in {time.monotonic() - start:.1f}s[/cyan]")
+    if dedup is not None and dedup.duplicates:
+        console.log(f"[cyan]Collapsed {dedup.duplicates} near-duplicate postings, saving {dedup.duplicates} scoring calls[/cyan]")
+        REGISTRY.inc("jobhunt_duplicates_collapsed_total", dedup.duplicates, help="Near-duplicate postings not scored")
+
+    cancelled = cancel is not None and cancel.is_set()
+    if expire_days is not None and not cancelled:
+        console.log(f"[cyan]Expired {store.expire(expire_days)} postings not seen in {expire_days:g} days[/cyan]")
+    if delta:
+        console.log(f"[cyan]Delta run: scored {len(scored)} new or changed postings[/cyan]")
+        scored = store.all_jobs()
+    else:
+        scored = journal.jobs()  # compact: the latest result per job, including resumed ones
+    store.close()
+
+    import pandas as pd
+    df = pd.DataFrame(scored)
+    if df.empty:
+        journal.close()
+        return df
+    df["Match %"] = df["Match %"].astype("Int64")  # failed scores stay blank, not 0
+    df.sort_values(by="Match %", ascending=False, inplace=True)
+    if cancelled:
+        journal.close()
+        console.log("[yellow]Run cancelled; keeping the previous saved results (rerun to resume)[/yellow]")
+        return df
+
+    # Save CSV + Parquet
+    with REGISTRY.timer("jobhunt_stage_seconds", stage="write"):
+        if output_dir:
+            write_results(df, os.path.join(output_dir, RESULTS_CSV), os.path.join(output_dir, RESULTS_PARQUET))
+            publish_results(output_dir)
+        else:
+            write_results(df)
+    update_search_index(df)
+    journal.complete()
+    journal.close()
+    console.log("[bold green]✅ Saved jobs_scored.csv / jobs_scored.parquet[/bold green]")
+    export_metrics(role=role, locations=locations)
+    return df
+
+
+# --- MATRIX RUNS ---
+def run_matrix(resumes, roles, locations, pages=1, batch_size=None, dedup_threshold=DEDUP_THRESHOLD,
+               prefilter_top=PREFILTER_TOP_N, prefilter_min=PREFILTER_MIN_SCORE, cancel=None):
+    """Score every resume against every role's postings; returns one long-format DataFrame.
+
+    resumes maps a name to resume text. Each (role, city) query is fetched once and each
+    unique posting is scored once per resume, however many roles it turned up under.
+    """
+    start = time.monotonic()
+    roles = list(dict.fromkeys(roles))
+    locations = list(dict.fromkeys(locations))
+    dedup = DuplicateIndex(dedup_threshold) if dedup_threshold > 0 else None
+
+    # Shared fetch: one request per (role, city, page); postings keyed so overlaps across roles collapse
+    unique = {}
+    found_by = {}  # job key -> roles whose search returned it
+    aliases = {}  # key of a near-duplicate -> key of its canonical posting
+    with REGISTRY.timer("jobhunt_stage_seconds", stage="fetch"):
+        for role, _, _, jobs in iter_query_pages(roles, locations, pages, cancel=cancel):
+            for job in jobs:
+                key = job_key(job)
+                key = aliases.get(key, key)  # a duplicate seen again under another role is only counted once
+                if key not in unique:
+                    canonical = dedup.add(job) if dedup is not None else None
+                    if canonical is not None:
+                        aliases[key] = job_key(canonical)
+                        key = aliases[key]
+                    else:
+                        unique[key] = job
+                found_by.setdefault(key, set()).add(role)
+    console.log(f"[green]✅ Fetched {len(unique)} unique jobs for {len(roles)} roles x {len(locations)} cities "
+                f"({len(roles) * len(locations) * pages} queries)[/green]")
+
+    rows = []
+    cache = get_score_cache()
+    with REGISTRY.timer("jobhunt_stage_seconds", stage="score"):
+        for name, resume_text in resumes.items():
+            if cancel is not None and cancel.is_set():
+                break
+            # Each resume scores its own copy, so Match % doesn't leak between resumes
+            jobs = [dict(job, _key=key) for key, job in unique.items()]
+            jobs, skipped = prefilter_jobs(jobs, resume_text, job_text, prefilter_top, prefilter_min)
+            for job in skipped:
+                _mark_prefiltered(job)
+            console.log(f"[bold yellow]Scoring {len(jobs)} jobs against {name}...[/bold yellow]")
+            scored = skipped + (list(score_stream(jobs, resume_text, cache, batch_size, cancel)) if jobs else [])
+            for job in scored:
+                key = job.pop("_key")
+                for role in sorted(found_by[key]):
+                    rows.append({"Resume": name, "Role": role, **job})
+    console.log(f"[cyan]Matrix of {len(resumes)} resumes x {len(roles)} roles: {len(rows)} rows "
+                f"in {time.monotonic() - start:.1f}s[/cyan]")
+
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df["Match %"] = df["Match %"].astype("Int64")
+    df.sort_values(by=["Resume", "Role", "Match %"], ascending=[True, True, False], inplace=True)
+    if cancel is not None and cancel.is_set():
+        return df
+    with REGISTRY.timer("jobhunt_stage_seconds", stage="write"):
+        write_results(df, MATRIX_CSV, MATRIX_PARQUET)
+    console.log(f"[bold green]✅ Saved {MATRIX_CSV}[/bold green]")
+    export_metrics(roles=roles, locations=locations, resumes=list(resumes))
+    return df
+
+
+def update_search_index(df):
+    """Add freshly written results to the full-text search index behind the dashboard's job search"""
+    if not SEARCH_INDEX_PATH:
+        return
+    try:
+        with REGISTRY.timer("jobhunt_stage_seconds", stage="index"):
+            count = index_results(df, SEARCH_INDEX_PATH)
+    except sqlite3.Error as e:
+        # The results are already saved; a stale search index shouldn't fail the run
+        console.log(f"[yellow]Could not update the search index: {e}[/yellow]")
+        return
+    console.log(f"[cyan]🔍 Indexed {count} postings in {SEARCH_INDEX_PATH}[/cyan]")
+
+
+def export_metrics(**context):
+    """Write the metrics registry as Prometheus text and append a JSON-lines snapshot"""
+    try:
+        if METRICS_PROM_PATH:
+            REGISTRY.write_prometheus(METRICS_PROM_PATH)
+        if METRICS_JSONL_PATH:
+            REGISTRY.append_jsonl(METRICS_JSONL_PATH, **context)
+    except OSError as e:
+        console.log(f"[yellow]Could not export metrics: {e}[/yellow]")
+
+
+def main(argv=None):
+    global JSEARCH_MODE
+    args = parse_args(argv)
+    JSEARCH_MODE = args.jsearch_mode
     role = os.getenv("JOB_ROLE", "Product Manager")
     cities_json = os.getenv("JOB_CITIES", '["Los Angeles"]')
     locations = json.loads(cities_json)
 
+    if args.dry_run:
+        settings = {"role": role, "locations": locations, **vars(args)}
+        settings.pop("dry_run")
+        print(json.dumps(settings, indent=2))
+        return
+
+    if args.resumes or args.roles:
+        resumes = {}
+        for path in args.resumes or ["resume.txt"]:
+            with open(path, "r") as f:
+                name = os.path.splitext(os.path.basename(path))[0]
+                resumes[path if name in resumes else name] = f.read()
+        df = run_matrix(
+            resumes, args.roles or [role], locations,
+            pages=args.pages,
+            batch_size=args.batch_size,
+            dedup_threshold=args.dedup_threshold,
+            prefilter_top=args.prefilter_top,
+            prefilter_min=args.prefilter_min,
+        )
+        if df.empty:
+            console.log("[red]❌ No jobs found. Exiting.[/red]")
+        else:
+            best = df.sort_values("Match %", ascending=False).groupby(["Resume", "Role"]).head(1)
+            console.print(best[["Resume", "Role", "Title", "Company", "Match %"]].to_string(index=False))
+        return
+
     resume_path = "resume.txt"
     if not os.path.exists(resume_path):
         raise FileNotFoundError("resume.txt not found. Please ensure resume upload writes to this file.")
@@ -122,23 +916,26 @@ def main():
     with open(resume_path, "r") as f:
         resume_text = f.read()
 
-    # Fetch and score jobs
-    jobs = fetch_jobs(role, locations, pages=1)
-    if not jobs:
+    df = run_search(
+        role, locations, resume_text,
+        pages=args.pages,
+        pipeline=args.pipeline,
+        batch_size=args.batch_size,
+        dedup_threshold=args.dedup_threshold,
+        prefilter_top=args.prefilter_top,
+        prefilter_min=args.prefilter_min,
+        delta=args.delta,
+        expire_days=args.expire_days,
+        batch_api=args.batch_api,
+    )
+    if df.empty:
         console.log("[red]❌ No jobs found. Exiting.[/red]")
         return
 
-    scored = score_all_jobs(jobs, resume_text)
-
-    # Save CSV
-    df = pd.DataFrame(scored)
-    df.sort_values(by="Match %", ascending=False, inplace=True)
-    df.to_csv("jobs_scored.csv", index=False)
-    console.log("[bold green]✅ Saved jobs_scored.csv[/bold green]")
-
     # Summary table
     filtered = df[df["Match %"] >= 70]
     if not filtered.empty:
+        from rich.table import Table
         table = Table(title="Top Matching Jobs")
         table.add_column("Title", style="cyan", no_wrap=True)
         table.add_column("Company", style="magenta")
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def job_key(job):
+    """JSearch job id, or a stable hash of the posting when the id is missing"""
+    if job.get("Job ID"):
+        return str(job["Job ID"])
+    h = hashlib.sha256()
+    for field in ("Title", "Company", "Location", "Link"):
+        h.update(str(job.get(field, "")).encode("utf-8"))
+        h.update(b"\0")
+    return "h:" + h.hexdigest()[:24]
+
+
+# --- PERSISTENT JOB STORE ---
+class JobStore:
+    """SQLite store of every posting seen, with first/last-seen times and its latest result"""
+
+    def __init__(self, path="jobs.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_key TEXT PRIMARY KEY,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " score_key TEXT,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def observe(self, job, now=None):
+        """Record that job was seen in this run; returns True if it is new"""
+        now = now or time.time()
+        key = job_key(job)
+        with self._lock:
+            cur = self._conn.execute("UPDATE jobs SET last_seen = ? WHERE job_key = ?", (now, key))
+            if cur.rowcount == 0:
+                self._conn.execute(
+                    "INSERT INTO jobs (job_key, first_seen, last_seen, data) VALUES (?, ?, ?, ?)",
+                    (key, now, now, json.dumps(job)),
+                )
+            self._conn.commit()
+        return cur.rowcount == 0
+
+    def needs_scoring(self, job, score_key):
+        """True unless this posting was already scored with the same resume/job/prompt"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score_key FROM jobs WHERE job_key = ?", (job_key(job),)
+            ).fetchone()
+        return row is None or row[0] != score_key
+
+    def save_result(self, job, score_key=None):
+        """Store the job's latest result; score_key None means it should be retried"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET data = ?, score_key = ? WHERE job_key = ?",
+                (json.dumps(job), score_key, job_key(job)),
+            )
+            self._conn.commit()
+
+    def all_jobs(self):
+        """Every stored posting with its latest result and seen timestamps"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT first_seen, last_seen, data FROM jobs ORDER BY first_seen"
+            ).fetchall()
+        jobs = []
+        for first_seen, last_seen, data in rows:
+            job = json.loads(data)
+            job["First Seen"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(first_seen))
+            job["Last Seen"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_seen))
+            jobs.append(job)
+        return jobs
+
+    def expire(self, max_age_days):
+        """Delete postings not seen in the last max_age_days; returns how many"""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM jobs WHERE last_seen < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
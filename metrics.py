@@ -0,0 +1,228 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from results_store import atomic_write_text
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH", "metrics.prom")
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "metrics.jsonl")
+
+# USD per 1M tokens (input, output)
+PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+# --- METRIC TYPES ---
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+# --- REGISTRY ---
+class Registry:
+    """Thread-safe set of labelled counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # name -> {label_key: value}
+        self.histograms = {}  # name -> {label_key: Histogram}
+        self.help = {}
+
+    def inc(self, name, value=1, help=None, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+            if help:
+                self.help[name] = help
+
+    def observe(self, name, value, help=None, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+            if help:
+                self.help[name] = help
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall-clock seconds spent inside the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def total(self, name, **labels):
+        """Sum of a counter over every series matching the given labels"""
+        want = set(_label_key(labels))
+        with self._lock:
+            return sum(v for key, v in self.counters.get(name, {}).items() if want <= set(key))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """JSON-serializable view of every metric"""
+        with self._lock:
+            return {
+                "ts": time.time(),
+                "counters": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for name, series in sorted(self.counters.items()) for key, value in series.items()
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(key), "count": h.count, "sum": h.sum,
+                     "p50": h.quantile(0.5), "p95": h.quantile(0.95),
+                     "buckets": list(zip(h.buckets + (math.inf,), h.counts))}
+                    for name, series in sorted(self.histograms.items()) for key, h in series.items()
+                ],
+            }
+
+    # --- EXPORT ---
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for le, n in zip(h.buckets + (math.inf,), h.counts):
+                        cumulative += n
+                        le_text = "+Inf" if le == math.inf else f"{le:g}"
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', le_text)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        atomic_write_text(path, self.to_prometheus())
+
+    def append_jsonl(self, path, **extra):
+        snap = self.snapshot()
+        snap.update(extra)
+        with open(path, "a") as f:
+            f.write(json.dumps(snap, default=str) + "\n")
+
+
+REGISTRY = Registry()
+
+
+# --- TOKEN ACCOUNTING ---
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    price_in, price_out = PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+BATCH_PRICE_FACTOR = 0.5  # Batch API requests are billed at half the synchronous price
+
+
+def record_usage(model, op, prompt_tokens, completion_tokens, registry=REGISTRY, price_factor=1.0):
+    """Count tokens and estimated USD cost for one OpenAI call"""
+    registry.inc("jobhunt_openai_tokens_total", prompt_tokens, help="OpenAI tokens used",
+                 model=model, op=op, kind="prompt")
+    registry.inc("jobhunt_openai_tokens_total", completion_tokens, model=model, op=op, kind="completion")
+    registry.inc("jobhunt_openai_cost_usd_total", estimate_cost(model, prompt_tokens, completion_tokens) * price_factor,
+                 help="Estimated OpenAI spend in USD", model=model, op=op)
+
+
+def read_last_jsonl(path):
+    """Most recent snapshot written by append_jsonl, or None"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - 1_000_000))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+
+def summarize_snapshot(snap):
+    """Headline numbers from a snapshot: latency table, tokens, cost, cache hit rates"""
+    def counter_sum(name, **labels):
+        return sum(c["value"] for c in snap["counters"]
+                   if c["name"] == name and all(c["labels"].get(k) == v for k, v in labels.items()))
+
+    caches = sorted({c["labels"]["cache"] for c in snap["counters"] if c["name"] == "jobhunt_cache_requests_total"})
+    hit_rates = {}
+    for cache in caches:
+        hits = counter_sum("jobhunt_cache_requests_total", cache=cache, result="hit")
+        lookups = counter_sum("jobhunt_cache_requests_total", cache=cache)
+        hit_rates[cache] = hits / lookups if lookups else 0.0
+
+    latency = [
+        {"metric": h["name"], "labels": ", ".join(f"{k}={v}" for k, v in sorted(h["labels"].items())),
+         "calls": h["count"], "p50 ms": round(h["p50"] * 1000, 1), "p95 ms": round(h["p95"] * 1000, 1)}
+        for h in snap["histograms"]
+    ]
+    return {
+        "latency": latency,
+        "prompt_tokens": counter_sum("jobhunt_openai_tokens_total", kind="prompt"),
+        "completion_tokens": counter_sum("jobhunt_openai_tokens_total", kind="completion"),
+        "cost_usd": counter_sum("jobhunt_openai_cost_usd_total"),
+        "retries": counter_sum("jobhunt_score_retries_total"),
+        "throttled": counter_sum("jobhunt_score_throttled_total"),
+        "cache_hit_rates": hit_rates,
+    }
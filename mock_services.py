@@ -0,0 +1,287 @@
+"""Local stand-ins for the JSearch and OpenAI chat-completions/responses/batch APIs.
+
+Used by bench_pipeline.py so the fetch -> score -> write pipeline can be
+measured without network access or API spend. Latency, error rate and 429 rate
+are configurable per service.
+"""
+import json
+import random
+from email.parser import BytesParser
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "roadmap stakeholders analytics sql python experimentation pricing growth platform "
+    "customers discovery metrics dashboards strategy launch agile api mobile payments "
+    "onboarding retention research design partnerships compliance cloud data ml"
+).split()
+
+
+class ServiceConfig:
+    """Behaviour of one mocked service"""
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, throttle_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+
+
+def synthetic_job(query, page, i):
+    """Deterministic fake JSearch posting"""
+    rng = random.Random(f"{query}|{page}|{i}")
+    city = query.split(" in ")[-1]
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 300)))
+    return {
+        "job_id": f"mock-{rng.getrandbits(48):012x}",
+        "job_title": f"{query.split(' in ')[0]} {rng.choice(['I', 'II', 'Senior', 'Lead', 'Staff'])}",
+        "employer_name": f"Company {rng.randint(1, 500)}",
+        "job_city": city,
+        "job_apply_link": f"https://jobs.example.com/{page}/{i}/{rng.randint(0, 10**9)}",
+        "job_description": f"Posting {page}-{i} in {city}. {words}",
+        "job_publisher": rng.choice(["LinkedIn", "Indeed", "Glassdoor", "ZipRecruiter"]),
+    }
+
+
+class MockAPI:
+    """One local HTTP server answering both /search (JSearch) and /v1/chat/completions"""
+
+    def __init__(self, jsearch=None, openai=None, jobs_per_page=10, max_pages=None, seed=0, port=0, batch_delay=0.5):
+        self.jsearch = jsearch or ServiceConfig()
+        self.openai = openai or ServiceConfig()
+        self.jobs_per_page = jobs_per_page
+        self.max_pages = max_pages
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()  # also guards counts
+        self.counts = {"search": 0, "chat": 0, "responses": 0, "batches": 0, "throttled": 0, "errors": 0}
+        self.batch_delay = batch_delay  # seconds a batch stays in_progress
+        self.files = {}
+        self.batches = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, name):
+        with self.rng_lock:
+            self.counts[name] += 1
+
+    def _roll(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _delay(self, config):
+        with self.rng_lock:
+            delay = max(0.0, self.rng.gauss(config.latency, config.jitter))
+        time.sleep(delay)
+
+    def _fault(self, config):
+        """Status code to fail with, or None"""
+        roll = self._roll()
+        if roll < config.throttle_rate:
+            self._count("throttled")
+            return 429
+        if roll < config.throttle_rate + config.error_rate:
+            self._count("errors")
+            return 500
+        return None
+
+    def search(self, query, page):
+        self._count("search")
+        if self.max_pages is not None and page > self.max_pages:
+            return {"status": "OK", "data": []}
+        return {"status": "OK", "data": [synthetic_job(query, page, i) for i in range(self.jobs_per_page)]}
+
+    def chat(self, body):
+        self._count("chat")
+        prompt = body["messages"][-1]["content"]
+        seed = sum(prompt.encode("utf-8")) % 997
+        if body.get("response_format", {}).get("type") == "json_object":
+            ids = [int(n) for n in re.findall(r"^### Job (\d+)$", prompt, re.M)]
+            content = json.dumps({"scores": [{"id": n, "score": (seed + 37 * n) % 101} for n in ids]})
+        else:
+            content = str(seed % 101)
+        prompt_tokens = len(prompt) // 4
+        return {
+            "id": f"chatcmpl-mock-{self.counts['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4 + 1,
+                      "total_tokens": prompt_tokens + len(content) // 4 + 1},
+        }
+
+    def response(self, body):
+        """Responses API reply: a short deterministic letter plus usage"""
+        self._count("responses")
+        prompt = body["input"] if isinstance(body.get("input"), str) else json.dumps(body.get("input"))
+        rng = random.Random(prompt)
+        text = "Dear Hiring Manager,\n\n" + " ".join(rng.choice(WORDS) for _ in range(120)) + "\n\nSincerely,\nApplicant"
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4,
+                 "total_tokens": len(prompt) // 4 + len(text) // 4,
+                 "input_tokens_details": {"cached_tokens": 0}, "output_tokens_details": {"reasoning_tokens": 0}}
+        message = {"id": "msg_mock", "type": "message", "role": "assistant", "status": "completed",
+                   "content": [{"type": "output_text", "text": text, "annotations": []}]}
+        return {"id": f"resp_mock_{self.counts['responses']}", "object": "response", "created_at": int(time.time()),
+                "model": body.get("model", "mock"), "status": "completed", "output": [message],
+                "parallel_tool_calls": True, "tool_choice": "auto", "tools": [], "usage": usage}
+
+    # --- BATCH API ---
+    def upload(self, filename, data, purpose):
+        file_id = f"file-mock-{len(self.files) + 1}"
+        self.files[file_id] = data
+        return {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def create_batch(self, body):
+        """Run every request up front; the batch reports completed once batch_delay has passed"""
+        self._count("batches")
+        lines = []
+        failed = 0
+        for line in self.files[body["input_file_id"]].decode("utf-8").splitlines():
+            request = json.loads(line)
+            if self._roll() < self.openai.error_rate:
+                failed += 1
+                lines.append({"id": f"batch_req_{len(lines)}", "custom_id": request["custom_id"],
+                              "response": None, "error": {"code": "server_error", "message": "mock failure"}})
+                continue
+            lines.append({"id": f"batch_req_{len(lines)}", "custom_id": request["custom_id"],
+                          "response": {"status_code": 200, "request_id": f"req_{len(lines)}",
+                                       "body": self.chat(request["body"])}, "error": None})
+        output = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        batch_id = f"batch_mock_{len(self.batches) + 1}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"], "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"], "created_at": int(time.time()),
+            "metadata": body.get("metadata"), "_ready_at": time.time() + self.batch_delay,
+            "_output": self.upload("output.jsonl", output, "batch_output")["id"],
+            "request_counts": {"total": len(lines), "completed": len(lines) - failed, "failed": failed},
+        }
+        return self.batch(batch_id)
+
+    def batch(self, batch_id):
+        record = self.batches[batch_id]
+        done = time.time() >= record["_ready_at"]
+        view = {k: v for k, v in record.items() if not k.startswith("_")}
+        view["status"] = "completed" if done else "in_progress"
+        view["output_file_id"] = record["_output"] if done else None
+        if not done:
+            view["request_counts"] = {**record["request_counts"], "completed": 0, "failed": 0}
+        return view
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send headers and body in one segment; otherwise delayed ACKs add ~40 ms per call
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _fail(self, status):
+                self._send(status, {"error": {"message": f"mock {status}", "type": "mock_error"}})
+
+            def _send_bytes(self, data):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                batch = re.fullmatch(r"/v1/batches/([\w-]+)", url.path)
+                content = re.fullmatch(r"/v1/files/([\w-]+)/content", url.path)
+                if batch and batch.group(1) in api.batches:
+                    return self._send(200, api.batch(batch.group(1)))
+                if content and content.group(1) in api.files:
+                    return self._send_bytes(api.files[content.group(1)])
+                if url.path != "/search":
+                    return self._fail(404)
+                api._delay(api.jsearch)
+                status = api._fault(api.jsearch)
+                if status:
+                    return self._fail(status)
+                qs = parse_qs(url.query)
+                self._send(200, api.search(qs["query"][0], int(qs.get("page", ["1"])[0])))
+
+            def _stream(self, response):
+                """Send a Responses API reply as server-sent events, a few words per delta"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                text = response["output"][0]["content"][0]["text"]
+                words = re.findall(r"\S+\s*", text)
+                events = [{"type": "response.created", "response": {**response, "status": "in_progress", "output": []}}]
+                events += [{"type": "response.output_text.delta", "item_id": "msg_mock", "output_index": 0,
+                            "content_index": 0, "delta": "".join(words[i:i + 3]), "logprobs": []}
+                           for i in range(0, len(words), 3)]
+                events.append({"type": "response.completed", "response": response})
+                for n, event in enumerate(events):
+                    event["sequence_number"] = n
+                    self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.close_connection = True
+
+            def _upload(self, raw):
+                """Accept a multipart/form-data file upload"""
+                message = BytesParser().parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + raw)
+                fields = {part.get_param("name", header="content-disposition"): part for part in message.get_payload()}
+                upload = fields["file"]
+                purpose = fields["purpose"].get_payload(decode=True).decode("utf-8")
+                self._send(200, api.upload(upload.get_filename(), upload.get_payload(decode=True), purpose))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                path = urlparse(self.path).path
+                if path == "/v1/files":
+                    return self._upload(raw)
+                body = json.loads(raw or b"{}")
+                if path == "/v1/batches":
+                    return self._send(200, api.create_batch(body))
+                if path not in ("/v1/chat/completions", "/v1/responses"):
+                    return self._fail(404)
+                api._delay(api.openai)
+                status = api._fault(api.openai)
+                if status:
+                    return self._fail(status)
+                if path == "/v1/chat/completions":
+                    return self._send(200, api.chat(body))
+                response = api.response(body)
+                if body.get("stream"):
+                    return self._stream(response)
+                self._send(200, response)
+
+        return Handler
@@ -0,0 +1,67 @@
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in",
+    "is", "it", "of", "on", "or", "our", "that", "the", "this", "to", "we", "will", "with",
+    "you", "your", "who", "what", "all", "can", "their", "they", "more", "other",
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+# --- BM25 RANKER ---
+def bm25_scores(query_text, docs, k1=1.5, b=0.75):
+    """BM25 relevance of every doc to the query, computed in one vectorized pass"""
+    import numpy as np
+
+    terms = sorted(set(tokenize(query_text)))
+    index = {t: i for i, t in enumerate(terms)}
+    if not docs or not terms:
+        return np.zeros(len(docs))
+
+    # Docs x query-terms count matrix; terms absent from the resume can't contribute
+    tf = np.zeros((len(docs), len(terms)), dtype=np.float32)
+    lengths = np.zeros(len(docs), dtype=np.float32)
+    for d, doc in enumerate(docs):
+        tokens = tokenize(doc)
+        lengths[d] = len(tokens)
+        for term, count in Counter(tokens).items():
+            i = index.get(term)
+            if i is not None:
+                tf[d, i] = count
+
+    n = len(docs)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avgdl = lengths.mean() or 1.0
+    norm = k1 * (1 - b + b * lengths / avgdl)
+    return ((tf * (k1 + 1)) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+
+def prefilter_jobs(jobs, resume_text, text_fn, top_n=None, min_score=None):
+    """Split jobs into (kept, skipped) by lexical relevance to the resume.
+
+    Scores are normalized to 0-1 against the best posting and stored on each job as
+    "Prefilter Score". A job is kept if it is in the top_n and at or above min_score.
+    """
+    if not jobs or (not top_n and min_score is None):
+        return list(jobs), []
+
+    scores = bm25_scores(resume_text, [text_fn(j) for j in jobs])
+    best = scores.max() if len(scores) else 0
+    relevance = scores / best if best > 0 else scores
+
+    order = relevance.argsort()[::-1]
+    keep = set(order[:top_n].tolist() if top_n else order.tolist())
+    if min_score is not None:
+        keep = {i for i in keep if relevance[i] >= min_score}
+
+    kept, skipped = [], []
+    for i, job in enumerate(jobs):
+        job["Prefilter Score"] = round(float(relevance[i]), 3)
+        (kept if i in keep else skipped).append(job)
+    return kept, skipped
@@ -0,0 +1,138 @@
+import hashlib
+import re
+
+CHARS_PER_TOKEN = 4  # rough average for English prose with the GPT-4o tokenizer
+MIN_SECTION_TOKENS = 24  # don't start a section that would be cut to a stub
+
+# Headings that open a section of a job description, in the order they're kept under a tight budget
+JOB_SECTIONS = (
+    ("requirements", r"requirements?|qualifications?|what you(?:'ll| will)? (?:bring|need)|who you are|"
+                     r"what we(?:'re| are) looking for|must.haves?|minimum qualifications|preferred qualifications"),
+    ("skills", r"(?:key |technical |required )?skills|tech(?:nology)? stack|tools|competencies"),
+    ("responsibilities", r"(?:key )?responsibilities|duties|what you(?:'ll| will) do|the role|your role|"
+                         r"day.to.day|in this role|job description|role overview|about the role"),
+)
+JOB_DROP = (r"benefits|perks|what we offer|compensation|salary|pay range|about us|about the company|who we are|"
+            r"equal (?:employment )?opportunity|eeo|diversity|accommodations?|disclaimer|how to apply")
+
+RESUME_SECTIONS = (
+    ("summary", r"(?:professional )?summary|profile|objective|about me"),
+    ("skills", r"(?:technical |core )?skills|competencies|technologies|tools"),
+    ("experience", r"(?:work |professional )?experience|work history|employment(?: history)?"),
+    ("projects", r"projects"),
+    ("education", r"education|academics?"),
+    ("certifications", r"certifications?|licenses?|awards|achievements"),
+)
+RESUME_DROP = r"references?|hobbies|interests|personal details|declaration"
+
+BOILERPLATE_RE = re.compile(
+    r"equal (?:employment )?opportunity|without regard to|affirmative action|reasonable accommodation|"
+    r"e-verify|pay transparency|401\(?k\)?|dental|vision insurance|paid time off|\bpto\b|"
+    r"benefits package|background check|drug.free|protected veteran|sexual orientation",
+    re.I,
+)
+CONTACT_RE = re.compile(r"\S+@\S+|https?://\S+|linkedin\.com\S*|\+?\d[\d\s().-]{8,}\d")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+BULLET_RE = re.compile(r"[•▪●]|\s{2,}")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _heading_matcher(sections, drop):
+    patterns = [(name, pattern) for name, pattern in sections] + [(None, drop)]
+    return [(name, re.compile(rf"^[#*\s]*(?:{pattern})[\s:*#-]*$", re.I)) for name, pattern in patterns]
+
+
+_JOB_HEADINGS = _heading_matcher(JOB_SECTIONS, JOB_DROP)
+_RESUME_HEADINGS = _heading_matcher(RESUME_SECTIONS, RESUME_DROP)
+
+
+def _classify(line, headings):
+    """(True, section) if line is a known heading (section None = drop), else (False, None)"""
+    if len(line) > 60:
+        return False, None
+    for name, pattern in headings:
+        if pattern.match(line):
+            return True, name
+    return False, None
+
+
+def _split_sections(text, headings, first="intro"):
+    """Ordered [(section, lines)] split at known headings; dropped sections come back as None"""
+    sections = [(first, [])]
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line in ("•", "-", "*"):
+            continue
+        is_heading, name = _classify(line, headings)
+        if is_heading:
+            sections.append((name, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, lines) for name, lines in sections if lines]
+
+
+def _truncate(text, max_tokens):
+    """Cut text to max_tokens, preferring a sentence or line boundary"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    return cut[:boundary + 1].rstrip() if boundary > limit // 2 else cut.rstrip()
+
+
+def _fit(sections, priority, max_tokens):
+    """Keep sections in priority order until the budget runs out, then restore document order"""
+    budget = max_tokens
+    kept = {}
+    for rank in priority:
+        for i, (name, text) in enumerate(sections):
+            if name != rank or (kept and budget < MIN_SECTION_TOKENS):
+                continue
+            piece = _truncate(text, budget)
+            if piece:
+                kept[i] = piece
+                budget -= estimate_tokens(piece) + 1
+    return "\n".join(kept[i] for i in sorted(kept))
+
+
+# --- JOB DESCRIPTIONS ---
+def compact_job(description, max_tokens=400):
+    """Requirements, skills and responsibilities of a posting, minus boilerplate, within max_tokens"""
+    sections = []
+    for name, lines in _split_sections(description or "", _JOB_HEADINGS):
+        if name is None:
+            continue
+        kept = [s for line in lines for s in SENTENCE_RE.split(line) if s and not BOILERPLATE_RE.search(s)]
+        if kept:
+            label = f"{name.title()}: " if name != "intro" else ""
+            sections.append((name, label + " ".join(kept)))
+    return _fit(sections, [name for name, _ in JOB_SECTIONS] + ["intro"], max_tokens)
+
+
+# --- RESUME DIGEST ---
+_digests = {}
+
+
+def resume_hash(resume_text):
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+
+def resume_digest(resume_text, max_tokens=800):
+    """Contact-free, section-prioritised digest of a resume, computed once per resume hash"""
+    key = (resume_hash(resume_text), max_tokens)
+    if key not in _digests:
+        sections = []
+        for name, lines in _split_sections(resume_text, _RESUME_HEADINGS, first="header"):
+            if name is None or name == "header":
+                continue  # name, address and contact details don't help the match
+            text = BULLET_RE.sub(" ", " ".join(CONTACT_RE.sub("", line) for line in lines)).strip()
+            sections.append((name, f"{name.title()}: {text}"))
+        if not sections:
+            # No recognisable headings: fall back to the whole resume without contact details
+            sections = [("summary", re.sub(r"\s+", " ", CONTACT_RE.sub("", resume_text)).strip())]
+        _digests[key] = _fit(sections, [name for name, _ in RESUME_SECTIONS], max_tokens)
+    return _digests[key]
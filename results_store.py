@@ -0,0 +1,163 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+RESULTS_CSV = "jobs_scored.csv"
+RESULTS_PARQUET = "jobs_scored.parquet"
+
+
+def _has_parquet():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# --- WRITE ---
+def atomic_write(write, path):
+    """Write to a temporary sibling, then rename over path so readers never see a partial file"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def atomic_write_text(path, text):
+    """atomic_write of a UTF-8 string"""
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+    atomic_write(write, path)
+
+
+def write_results(df, csv_path=RESULTS_CSV, parquet_path=RESULTS_PARQUET):
+    """Write scored jobs as Parquet (when pyarrow is available) alongside the CSV"""
+    atomic_write(lambda tmp: df.to_csv(tmp, index=False), csv_path)
+    if _has_parquet():
+        atomic_write(lambda tmp: df.to_parquet(tmp, index=False), parquet_path)
+
+
+def publish_results(run_dir, csv_path=RESULTS_CSV, parquet_path=RESULTS_PARQUET):
+    """Swap one run's result files in as the shared results, each with a single rename"""
+    for path in (csv_path, parquet_path):
+        source = os.path.join(run_dir, os.path.basename(path))
+        if os.path.exists(source):
+            atomic_write(lambda tmp: shutil.copyfile(source, tmp), path)
+
+
+# --- READ ---
+def results_version(csv_path=RESULTS_CSV, parquet_path=RESULTS_PARQUET):
+    """(path, mtime, size) of the freshest results file, or None if there are none.
+
+    Used as a cache key: it changes whenever a run rewrites the results.
+    """
+    candidates = []
+    if _has_parquet() and os.path.exists(parquet_path):
+        candidates.append(parquet_path)
+    if os.path.exists(csv_path):
+        candidates.append(csv_path)
+    if not candidates:
+        return None
+    # Prefer Parquet unless the CSV was written after it by something else
+    path = max(candidates, key=lambda p: (os.stat(p).st_mtime_ns, p.endswith(".parquet")))
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def read_results(path):
+    import pandas as pd
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+# --- JOURNAL ---
+RESULTS_JOURNAL = "jobs_scored.journal.jsonl"
+
+
+class ResultsJournal:
+    """Append-only JSON-lines log of finished jobs, so an interrupted run can resume.
+
+    The first line identifies the run's inputs; opening the journal with the same
+    run id resumes it, anything else starts a fresh one. A torn last line from a
+    crash is ignored on read.
+    """
+
+    def __init__(self, run_id, path=RESULTS_JOURNAL):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        header, records = read_journal(path)
+        self.resumed = header is not None and header.get("run") == run_id and not header.get("complete")
+        self.records = {r["key"]: r["job"] for r in records} if self.resumed else {}
+        if self.resumed:
+            self._file = open(path, "a")
+        else:
+            self._file = open(path, "w")
+            self._write({"run": run_id, "started": time.time()})
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, default=str) + "\n")
+        self._file.flush()  # survives the process dying; the OS still holds the bytes
+
+    def done(self, key):
+        """Journalled result for key if it finished (scored or prefiltered), else None"""
+        job = self.records.get(key)
+        if job is not None and job.get("Score Status") in ("scored", "prefiltered"):
+            return job
+        return None
+
+    def append(self, key, job):
+        with self._lock:
+            self.records[key] = job
+            self._write({"key": key, "job": job})
+
+    def jobs(self):
+        """Latest record per job, in first-finished order"""
+        with self._lock:
+            return list(self.records.values())
+
+    def complete(self):
+        """Mark the run finished so the next run starts a new journal"""
+        with self._lock:
+            self._write({"run": self.run_id, "complete": True})
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_journal(path=RESULTS_JOURNAL):
+    """(header, [entries]) from a journal; header is None if it is missing or empty"""
+    header, records, _ = tail_journal(path)
+    return header, records
+
+
+def tail_journal(path=RESULTS_JOURNAL, offset=0):
+    """(header, new entries, next offset): read complete lines written since offset"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return None, [], offset
+    end = data.rfind(b"\n") + 1  # leave a half-written last line for the next read
+    header = None
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if "run" in entry:
+            header = {**(header or {}), **entry}
+        elif "key" in entry:
+            records.append(entry)
+    return header, records, offset + end
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from job_runner import JobRun
+from prompt_compact import resume_hash
+
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+KEEP_RUNS = int(os.getenv("KEEP_RUNS", "20"))
+STOP_TIMEOUT = float(os.getenv("RUN_STOP_TIMEOUT", "15"))  # seconds to wait for a cancelled run to stop
+
+
+def run_key(role, locations, resume_text, **options):
+    """Identity of a search: same role, same set of cities, same resume and options"""
+    return (
+        " ".join(role.lower().split()),
+        tuple(sorted({" ".join(loc.lower().split()) for loc in locations})),
+        resume_hash(resume_text),
+        json.dumps(options, sort_keys=True, default=str),
+    )
+
+
+# --- SINGLE-FLIGHT RUNS ---
+class RunCoordinator:
+    """Shares one in-flight JobRun between every caller asking for the same search.
+
+    Each run writes its journal and results under its own directory and publishes
+    them with an atomic rename, so concurrent runs never clobber the shared files.
+    """
+
+    def __init__(self, runs_dir=RUNS_DIR, keep=KEEP_RUNS, stop_timeout=STOP_TIMEOUT):
+        self.runs_dir = runs_dir
+        self.keep = keep
+        self.stop_timeout = stop_timeout
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> [run, watchers]
+
+    def _run_dir(self, key):
+        # Deterministic per key, so a restarted identical search resumes from its journal
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.runs_dir, digest)
+
+    def submit(self, role, locations, resume_text, **options):
+        """(run, attached): the identical run already in progress, or a newly started one"""
+        key = run_key(role, locations, resume_text, **options)
+        while True:
+            with self._lock:
+                self._forget_finished()
+                entry = self._inflight.get(key)
+                if entry is None:
+                    run_dir = self._run_dir(key)
+                    os.makedirs(run_dir, exist_ok=True)
+                    run = JobRun(role, locations, resume_text, output_dir=run_dir, **options).start()
+                    self._inflight[key] = [run, 1]
+                    break
+                if entry[1] > 0:
+                    entry[1] += 1
+                    return entry[0], True
+                winding_down = entry[0]
+            # Cancelled by its last watcher but still writing to the same run directory: let it stop first
+            if not winding_down.join(self.stop_timeout):
+                raise RuntimeError("The same search is still stopping after a cancel; try again in a moment.")
+        self._prune()
+        return run, False
+
+    def detach(self, run):
+        """Stop watching run; it is only cancelled once nobody else is watching it (returns True then)"""
+        with self._lock:
+            for entry in self._inflight.values():
+                if entry[0] is run:
+                    # The entry stays until the run has stopped, so its directory isn't reused meanwhile
+                    entry[1] = max(0, entry[1] - 1)
+                    if entry[1] > 0:
+                        return False
+                    break
+        run.cancel()
+        return True
+
+    def active(self):
+        with self._lock:
+            self._forget_finished()
+            return [(entry[0], entry[1]) for entry in self._inflight.values()]
+
+    def _forget_finished(self):
+        for key in [k for k, (run, _) in self._inflight.items() if not run.running]:
+            del self._inflight[key]
+
+    def _prune(self):
+        """Drop the oldest run directories beyond keep, never one that is in flight"""
+        with self._lock:
+            busy = {self._run_dir(key) for key in self._inflight}
+        try:
+            names = os.listdir(self.runs_dir)
+        except OSError:
+            return
+        dirs = [os.path.join(self.runs_dir, n) for n in names if os.path.isdir(os.path.join(self.runs_dir, n))]
+        dirs.sort(key=os.path.getmtime, reverse=True)
+        for path in dirs[self.keep:]:
+            if path not in busy:
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,90 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+# --- PERSISTENT SCORE CACHE ---
+class ScoreCache:
+    """SQLite-backed cache of match scores keyed by resume/job/model/prompt hash"""
+
+    def __init__(self, path="score_cache.sqlite", max_entries=50000, max_age_days=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key TEXT PRIMARY KEY,"
+            " score INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(resume_text, job_text, model, prompt_version):
+        """Content hash of everything that can change a score"""
+        h = hashlib.sha256()
+        for part in (resume_text, job_text, model, str(prompt_version)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key):
+        """Return the cached score for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score, created_at FROM scores WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE scores SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, score):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scores (key, score, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, int(score), now, now),
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        with self._lock:
+            cutoff = time.time() - self.max_age
+            expired = self._conn.execute("DELETE FROM scores WHERE created_at < ?", (cutoff,)).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM scores WHERE key IN ("
+                " SELECT key FROM scores ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+        return expired + overflow
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
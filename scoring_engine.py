@@ -0,0 +1,162 @@
+import queue
+import random
+import threading
+import time
+
+
+class ScoreFailed(Exception):
+    """Scoring gave up on a job; distinct from a genuine score of 0"""
+
+
+# --- ERROR CLASSIFICATION ---
+def _status_code(exc):
+    code = getattr(exc, "status_code", None)
+    if code is None and getattr(exc, "response", None) is not None:
+        code = getattr(exc.response, "status_code", None)
+    return code
+
+
+def is_throttle(exc):
+    return _status_code(exc) == 429 or "RateLimit" in type(exc).__name__
+
+
+def is_timeout(exc):
+    return isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__
+
+
+def is_retryable(exc):
+    if isinstance(exc, ScoreFailed):
+        return False
+    if is_throttle(exc) or is_timeout(exc) or "Connection" in type(exc).__name__:
+        return True
+    code = _status_code(exc)
+    return code is not None and code >= 500
+
+
+def _retry_after(exc):
+    """Seconds the server asked us to wait, if it said so"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# --- AIMD CONCURRENCY LIMIT ---
+class AIMDLimit:
+    """Concurrency limit that grows additively while healthy and halves on overload"""
+
+    def __init__(self, initial=5, min_limit=1, max_limit=16, target_latency=8.0, backoff=0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, stop=None):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                if stop is not None and stop.is_set():
+                    raise ScoreFailed("cancelled")
+                self._cond.wait(timeout=0.5)
+            self.in_flight += 1
+
+    def release(self, latency, exc=None):
+        with self._cond:
+            self.in_flight -= 1
+            if exc is None:
+                # Roughly +1 per full window of healthy calls
+                if latency <= self.target_latency:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            elif is_retryable(exc):
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            self._cond.notify_all()
+
+
+# --- ADAPTIVE SCORER ---
+class AdaptiveScorer:
+    """Runs scoring calls under an AIMD concurrency limit with jittered retries"""
+
+    def __init__(self, initial=5, min_limit=1, max_limit=16, target_latency=8.0,
+                 max_retries=4, base_delay=1.0, max_delay=30.0, log=None, stop=None):
+        self.limit = AIMDLimit(initial, min_limit, max_limit, target_latency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stop = stop or threading.Event()  # set to cancel outstanding work
+        self.log = log or (lambda msg: None)
+        self.retries = 0
+        self.throttled = 0
+
+    def call(self, fn, *args):
+        """Call fn under the concurrency limit, retrying transient failures"""
+        for attempt in range(self.max_retries + 1):
+            self.limit.acquire(self.stop)
+            start = time.monotonic()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.limit.release(time.monotonic() - start, e)
+                if is_throttle(e):
+                    self.throttled += 1
+                if not is_retryable(e) or attempt == self.max_retries or self.stop.is_set():
+                    raise
+                # Full jitter backoff, but never sooner than Retry-After
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                delay = max(delay, _retry_after(e) or 0)
+                self.retries += 1
+                self.log(f"[yellow]Retrying in {delay:.1f}s (limit {int(self.limit.limit)}): {e}[/yellow]")
+                if self.stop.wait(delay):
+                    raise
+            else:
+                self.limit.release(time.monotonic() - start)
+                return result
+
+    def map_unordered(self, fn, items):
+        """Apply fn to items on worker threads, yielding (item, result, error) as they finish"""
+        items = iter(items)
+        items_lock = threading.Lock()
+        results = queue.Queue()
+        finished = threading.Event()
+
+        def next_item():
+            with items_lock:
+                if self.stop.is_set() or finished.is_set():
+                    return None, False
+                try:
+                    return next(items), True
+                except StopIteration:
+                    return None, False
+
+        def worker():
+            try:
+                while True:
+                    item, ok = next_item()
+                    if not ok:
+                        break
+                    try:
+                        results.put((item, fn(item), None))
+                    except Exception as e:
+                        results.put((item, None, e))
+            finally:
+                results.put(_DONE)
+
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(self.limit.max_limit)]
+        for t in workers:
+            t.start()
+        try:
+            remaining = len(workers)
+            while remaining:
+                out = results.get()
+                if out is _DONE:
+                    remaining -= 1
+                else:
+                    yield out
+        finally:
+            finished.set()
+
+
+_DONE = object()
@@ -0,0 +1,288 @@
+"""Full-text index of every scored posting, for the dashboard's job search.
+
+Results are upserted into an SQLite FTS5 table each time a run writes them, so
+the index keeps the whole history rather than just the latest run. Queries take
+keywords, "quoted phrases", field filters and exclusions:
+
+    python search_index.py 'skill:python "product roadmap" -intern'
+    python search_index.py --add jobs_scored.parquet       # backfill from a results file
+"""
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from job_store import job_key
+
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "jobs_index.sqlite")
+# BM25 costs a few microseconds per hit; broader queries are ordered by Match % instead
+RELEVANCE_MAX_HITS = int(os.getenv("SEARCH_RELEVANCE_MAX_HITS", "10000"))
+
+# Canonical skill names recognised in titles and descriptions
+SKILLS = (
+    "Python", "SQL", "R", "Java", "JavaScript", "TypeScript", "Go", "Scala", "C++", "C#", "Rust", "Kotlin",
+    "Swift", "React", "Node.js", "Django", "Flask", "Spark", "Hadoop", "Kafka", "Airflow", "dbt", "Snowflake",
+    "BigQuery", "Redshift", "Databricks", "PostgreSQL", "MySQL", "MongoDB", "Redis", "AWS", "Azure", "GCP",
+    "Docker", "Kubernetes", "Terraform", "Linux", "Git", "REST", "GraphQL", "Excel", "Tableau", "Power BI",
+    "Looker", "pandas", "NumPy", "TensorFlow", "PyTorch", "scikit-learn", "Machine Learning", "Deep Learning",
+    "NLP", "LLM", "Computer Vision", "Statistics", "A/B Testing", "Data Analysis", "Data Visualization",
+    "ETL", "Agile", "Scrum", "Jira", "Figma", "Roadmapping", "Product Strategy", "User Research",
+    "Stakeholder Management", "Go-to-Market", "SaaS", "API", "CI/CD", "Microservices", "Salesforce",
+)
+_SKILL_ALIASES = {"golang": "Go", "postgres": "PostgreSQL", "k8s": "Kubernetes", "sklearn": "scikit-learn",
+                  "ml": "Machine Learning", "gcp": "GCP", "google cloud": "GCP", "nodejs": "Node.js",
+                  "a/b tests": "A/B Testing", "ab testing": "A/B Testing", "roadmap": "Roadmapping",
+                  "large language models": "LLM", "llms": "LLM", "natural language processing": "NLP"}
+_SKILL_NAMES = {**{s.lower(): s for s in SKILLS}, **_SKILL_ALIASES}
+# Case-sensitive for the short names that are also ordinary words ("Go", "R", "REST")
+_EXACT_CASE = {"Go", "R", "REST", "API", "Git", "Excel", "Swift", "Rust", "React"}
+_SKILL_RE = re.compile(
+    r"(?<![\w+#./-])(" + "|".join(re.escape(s) for s in sorted(_SKILL_NAMES, key=len, reverse=True)) + r")(?![\w+#/-])",
+    re.I,
+)
+
+TOKEN_RE = re.compile(r'(-)?(?:(skills?|title|company|description):)?(?:"([^"]*)"|(\S+))', re.I)
+FIELDS = {"skill": "skills", "skills": "skills", "title": "title", "company": "company", "description": "description"}
+# (column, result column) pairs stored for every posting
+COLUMNS = (("title", "Title"), ("company", "Company"), ("location", "Location"), ("source", "Source"),
+           ("link", "Link"), ("match", "Match %"), ("status", "Score Status"), ("skills", "Skills"))
+
+
+def extract_skills(text):
+    """Canonical names of the known skills mentioned in text, in first-mention order"""
+    found = {}
+    for m in _SKILL_RE.finditer(text or ""):
+        name = _SKILL_NAMES[m.group(1).lower()]
+        if name in _EXACT_CASE and m.group(1).lower() == name.lower() and m.group(1) != name:
+            continue
+        found.setdefault(name, None)
+    return list(found)
+
+
+def to_fts_query(query):
+    """FTS5 MATCH expression for a search box query, or None if it has no searchable terms.
+
+    Every term is quoted, so operators and punctuation typed by the user can't
+    produce an FTS5 syntax error. Exclusions only apply alongside a positive term.
+    """
+    include, exclude = [], []
+    for negate, field, phrase, word in TOKEN_RE.findall(query or ""):
+        text = (phrase or word).replace('"', "").strip()
+        if not re.search(r"\w", text):
+            continue
+        term = f'"{text}"'
+        if field:
+            term = f"{FIELDS[field.lower()]} : {term}"
+        (exclude if negate else include).append(term)
+    if not include:
+        return None
+    return " AND ".join(include) + "".join(f" NOT {term}" for term in exclude)
+
+
+# --- INDEX ---
+class SearchIndex:
+    """SQLite FTS5 index over title, company, description and extracted skills, with facet columns.
+
+    postings holds only the short filter/facet columns so counts and facets scan a
+    narrow table; the description text lives in the FTS table alone.
+    """
+
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._writes = 0
+        self._cached = None
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " id INTEGER PRIMARY KEY,"
+            " job_key TEXT NOT NULL UNIQUE,"
+            " title TEXT, company TEXT, location TEXT, source TEXT, link TEXT,"
+            " match INTEGER, status TEXT, skills TEXT,"
+            " indexed_at REAL NOT NULL);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS postings_fts USING fts5("
+            " title, company, description, skills, tokenize='porter unicode61');"
+        )
+        self._conn.commit()
+
+    def add(self, jobs):
+        """Insert or refresh postings (result rows as dicts); returns how many were written"""
+        now = time.time()
+        with self._lock, self._conn:  # one transaction: a failed batch leaves the index as it was
+            for job in jobs:
+                job = {k: (None if _missing(v) else v) for k, v in job.items()}
+                skills = ", ".join(extract_skills(f"{job.get('Title') or ''}\n{job.get('Description') or ''}"))
+                match = job.get("Match %")
+                key = job_key(job)
+                self._conn.execute(
+                    "INSERT INTO postings (job_key, title, company, location, source, link, match, status, skills,"
+                    " indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (job_key) DO UPDATE SET title = excluded.title, company = excluded.company,"
+                    " location = excluded.location, source = excluded.source, link = excluded.link,"
+                    " match = excluded.match, status = excluded.status, skills = excluded.skills,"
+                    " indexed_at = excluded.indexed_at",
+                    (key, job.get("Title"), job.get("Company"), job.get("Location"), job.get("Source"),
+                     job.get("Link"), None if match is None else int(match), job.get("Score Status"), skills, now),
+                )
+                posting_id = self._conn.execute("SELECT id FROM postings WHERE job_key = ?", (key,)).fetchone()[0]
+                self._conn.execute("DELETE FROM postings_fts WHERE rowid = ?", (posting_id,))
+                self._conn.execute(
+                    "INSERT INTO postings_fts (rowid, title, company, description, skills) VALUES (?, ?, ?, ?, ?)",
+                    (posting_id, job.get("Title"), job.get("Company"), job.get("Description"), skills),
+                )
+            self._writes += 1
+        return len(jobs)
+
+    def _columns(self):
+        """Sorted ids with source, city and Match % of every posting, reloaded only when the index changes.
+
+        Facets and ordering run over these arrays, so a broad query costs one FTS
+        lookup instead of a table row fetch per hit.
+        """
+        import numpy as np
+
+        version = (self._conn.execute("PRAGMA data_version").fetchone()[0], self._writes)
+        if self._cached is None or self._cached["version"] != version:
+            rows = self._conn.execute(
+                "SELECT id, COALESCE(source, ''), COALESCE(location, ''), COALESCE(match, -1) FROM postings ORDER BY id"
+            ).fetchall()
+            ids, sources, cities, match = zip(*rows) if rows else ((), (), (), ())
+            source_labels, city_labels = {}, {}
+            self._cached = {
+                "version": version,
+                "ids": np.array(ids, dtype=np.int64),
+                "match": np.array(match, dtype=np.int16),
+                "source_codes": np.array([source_labels.setdefault(v, len(source_labels)) for v in sources], dtype=np.int32),
+                "city_codes": np.array([city_labels.setdefault(v, len(city_labels)) for v in cities], dtype=np.int32),
+                "sources": list(source_labels), "cities": list(city_labels),
+            }
+        return self._cached
+
+    def search(self, query="", min_match=None, cities=(), sources=(), limit=50, offset=0, order="match"):
+        """One page of matches plus their total and facet counts.
+
+        Returns {"total", "rows", "facets", "order"}; facets maps "Source" and
+        "Location" to [(value, count)], each ignoring its own selection so the other
+        values stay visible with the counts they would add. order is "match" or
+        "relevance" (BM25 with title and skills weighted up); the returned order says
+        which was used, as queries with more than RELEVANCE_MAX_HITS hits fall back to "match".
+        """
+        import numpy as np
+
+        fts = to_fts_query(query)
+        with self._lock:
+            cols = self._columns()
+            if fts:
+                sql = "SELECT rowid FROM postings_fts WHERE postings_fts MATCH ?"
+                hits = np.fromiter((r[0] for r in self._conn.execute(sql, (fts,))), dtype=np.int64)
+                hits = np.searchsorted(cols["ids"], hits)
+                hits = hits[hits < len(cols["ids"])]  # a posting added after the arrays were loaded
+            else:
+                hits = np.arange(len(cols["ids"]))
+            if not fts or len(hits) > RELEVANCE_MAX_HITS:
+                order = "match"
+
+            match = cols["match"][hits]
+            source_codes, city_codes = cols["source_codes"][hits], cols["city_codes"][hits]
+            base = match >= min_match if min_match else np.ones(len(hits), dtype=bool)
+            in_city = np.isin(city_codes, [cols["cities"].index(c) for c in cities if c in cols["cities"]]) \
+                if cities else base
+            in_source = np.isin(source_codes, [cols["sources"].index(s) for s in sources if s in cols["sources"]]) \
+                if sources else base
+            keep = base & in_city & in_source
+            facets = {
+                "Source": np.bincount(source_codes[base & in_city], minlength=len(cols["sources"])),
+                "Location": np.bincount(city_codes[base & in_source], minlength=len(cols["cities"])),
+            }
+
+            selected = hits[keep]
+            if order == "relevance":
+                ranked = np.fromiter((r[0] for r in self._conn.execute(
+                    sql + " ORDER BY bm25(postings_fts, 10.0, 4.0, 1.0, 6.0)", (fts,))), dtype=np.int64)
+                ranked = np.searchsorted(cols["ids"], ranked)
+                wanted = np.zeros(len(cols["ids"]) + 1, dtype=bool)
+                wanted[selected] = True
+                selected = ranked[wanted[np.minimum(ranked, len(cols["ids"]))]]
+            else:
+                # Best Match % first, blanks (-1) last, ties in indexing order
+                selected = selected[np.argsort(-cols["match"][selected], kind="stable")]
+            page_ids = cols["ids"][selected[offset:offset + limit]].tolist()
+            names = ", ".join(f"p.{column}" for column, _ in COLUMNS)
+            found = {row[0]: row[1:] for row in self._conn.execute(
+                f"SELECT p.id, {names} FROM postings p WHERE p.id IN ({', '.join('?' * len(page_ids))})", page_ids
+            )} if page_ids else {}
+        return {
+            "total": int(keep.sum()),
+            "order": order,
+            "rows": [dict(zip((name for _, name in COLUMNS), found[i])) for i in page_ids if i in found],
+            "facets": {name: sorted(((labels[k], int(n)) for k, n in enumerate(counts) if n),
+                                    key=lambda kv: -kv[1])
+                       for (name, counts), labels in zip(facets.items(), (cols["sources"], cols["cities"]))},
+        }
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+
+    def optimize(self):
+        """Merge the FTS segments; worth doing after a large backfill"""
+        with self._lock:
+            self._conn.execute("INSERT INTO postings_fts (postings_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _missing(value):
+    # pandas hands back NaN/NA for blank cells
+    try:
+        return value is None or value != value or str(value) == "<NA>"
+    except TypeError:
+        return str(value) == "<NA>"
+
+
+def index_results(df, path=SEARCH_INDEX_PATH):
+    """Add a results DataFrame to the search index; returns the number of postings written"""
+    index = SearchIndex(path)
+    try:
+        return index.add(df.to_dict("records"))
+    finally:
+        index.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search (or backfill) the full-text index of scored jobs")
+    parser.add_argument("query", nargs="?", default="", help='e.g. skill:python "product roadmap" -intern')
+    parser.add_argument("--add", nargs="+", metavar="FILE", help="index these results CSV/Parquet files first")
+    parser.add_argument("--min-match", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--index", default=SEARCH_INDEX_PATH, help="index database (env SEARCH_INDEX_PATH)")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.index)
+    if args.add:
+        from results_store import read_results
+        for path in args.add:
+            print(f"Indexed {index.add(read_results(path).to_dict('records'))} postings from {path}")
+        index.optimize()
+    if args.query or not args.add:
+        start = time.perf_counter()
+        found = index.search(args.query, args.min_match, limit=args.limit, order="relevance" if args.query else "match")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{found['total']} of {index.count()} postings match ({elapsed:.0f} ms)")
+        for row in found["rows"]:
+            print(f"{row['Match %'] if row['Match %'] is not None else '-':>4}  {row['Title']} @ {row['Company']}"
+                  f" ({row['Location']}; {row['Source']})  [{row['Skills']}]")
+        for name, counts in found["facets"].items():
+            print(f"{name}: " + ", ".join(f"{value or '?'} {n}" for value, n in counts[:10]))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Sharded role x city x page sweeps on a durable SQLite work queue.
+
+    python sweep.py init nightly --roles "Product Manager" "Data Analyst" --pages 5
+    python sweep.py work nightly --processes 8     # on as many hosts as share sweep.sqlite
+    python sweep.py status nightly
+    python sweep.py merge nightly                  # also done by `work` once the queue drains
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+import job_scraper
+from job_store import job_key
+from rate_limit import RateLimiter
+from results_store import write_results
+from scoring_engine import ScoreFailed
+from work_queue import WorkQueue
+
+console = job_scraper.console
+
+# --- CONFIG ---
+SWEEP_QUEUE_PATH = os.getenv("SWEEP_QUEUE_PATH", "sweep.sqlite")
+SWEEP_LEASE_SECONDS = float(os.getenv("SWEEP_LEASE_SECONDS", "120"))  # visibility timeout of a leased task
+SWEEP_MAX_ATTEMPTS = int(os.getenv("SWEEP_MAX_ATTEMPTS", "5"))
+SWEEP_CHUNK_SIZE = int(os.getenv("SWEEP_CHUNK_SIZE", "25"))  # jobs per scoring task
+SWEEP_POLL_INTERVAL = float(os.getenv("SWEEP_POLL_INTERVAL", "1"))  # seconds an idle worker waits
+SWEEP_CSV = os.getenv("SWEEP_CSV", "sweep_scored.csv")
+SWEEP_PARQUET = os.getenv("SWEEP_PARQUET", "sweep_scored.parquet")
+
+
+def open_queue(path=SWEEP_QUEUE_PATH):
+    return WorkQueue(path, visibility_timeout=SWEEP_LEASE_SECONDS, max_attempts=SWEEP_MAX_ATTEMPTS)
+
+
+# --- SHARDING ---
+def init_sweep(queue, name, roles, locations, pages, resume_text, chunk_size=SWEEP_CHUNK_SIZE):
+    """Register a sweep and queue one fetch task per (role, city, page); safe to repeat"""
+    config = {"roles": roles, "locations": locations, "pages": pages,
+              "resume_text": resume_text, "chunk_size": chunk_size}
+    if not queue.create_sweep(name, config):
+        console.log(f"[yellow]Sweep {name} already exists; keeping its settings and progress[/yellow]")
+        return 0
+    tasks = [(f"fetch:{role}:{location}:{page}", "fetch", {"role": role, "location": location, "page": page})
+             for role in roles for location in locations for page in range(1, pages + 1)]
+    added = queue.enqueue(name, tasks)
+    console.log(f"[green]✅ Sweep {name}: queued {added} fetch tasks "
+                f"({len(roles)} roles x {len(locations)} cities x {pages} pages)[/green]")
+    return added
+
+
+def fetch_task(limiter, payload, chunk_size):
+    """Fetch one page; returns (result, job keys to claim, follow_up) for WorkQueue.complete"""
+    role, location, page = payload["role"], payload["location"], payload["page"]
+    jobs = {job_key(job): dict(job, Role=role) for job in job_scraper._fetch_page(limiter, role, location, page)}
+
+    def follow_up(fresh):
+        # Only postings no other page has claimed get scored, so overlaps across roles are scored once
+        new = [jobs[key] for key in fresh]
+        return [(f"score:{role}:{location}:{page}:{i}", "score", new[i:i + chunk_size])
+                for i in range(0, len(new), chunk_size)]
+
+    return {"jobs": len(jobs)}, list(jobs), follow_up
+
+
+def score_task(payload, resume_text, last_attempt=False):
+    """Score one chunk of postings; the shared score cache makes a retried chunk cheap"""
+    jobs = list(job_scraper.score_stream(payload, resume_text))
+    failed = sum(job["Score Status"] == "failed" for job in jobs)
+    if failed and not last_attempt:
+        # Retry later; the jobs that did score are already cached and won't be paid for twice
+        raise ScoreFailed(f"{failed} of {len(jobs)} jobs could not be scored")
+    return jobs
+
+
+class _Heartbeat:
+    """Keeps extending a task's lease while it runs, so only a dead worker's tasks time out"""
+
+    def __init__(self, queue, task_id, owner):
+        self.queue = queue
+        self.task_id = task_id
+        self.owner = owner
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        while not self._stop.wait(self.queue.visibility_timeout / 3):
+            if not self.queue.extend(self.task_id, self.owner):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# --- WORKERS ---
+def work(name, queue_path=SWEEP_QUEUE_PATH, fetch_rate=None, wait=False):
+    """Lease and run tasks until the sweep is drained (or forever with wait); returns tasks done"""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    queue = open_queue(queue_path)
+    config = queue.sweep_config(name)
+    if config is None:
+        raise ValueError(f"No sweep named {name!r} in {queue_path}; run `sweep.py init` first.")
+    limiter = RateLimiter(fetch_rate if fetch_rate is not None else job_scraper.FETCH_RATE)
+    done = 0
+    while True:
+        task = queue.lease(name, owner)
+        if task is None:
+            if not wait and queue.drained(name):
+                break
+            time.sleep(SWEEP_POLL_INTERVAL)
+            continue
+        task_id, kind, payload, attempt = task
+        claim, follow_up = (), None
+        try:
+            with _Heartbeat(queue, task_id, owner):
+                if kind == "fetch":
+                    result, claim, follow_up = fetch_task(limiter, payload, config["chunk_size"])
+                else:
+                    result = score_task(payload, config["resume_text"], attempt >= queue.max_attempts)
+        except Exception as e:
+            outcome = queue.fail(task_id, owner, e)
+            console.log(f"[red]⚠️ {kind} task {task_id} failed (attempt {attempt}, {outcome}): {e}[/red]")
+            continue
+        if queue.complete(task_id, owner, result, sweep=name, claim=claim, follow_up=follow_up):
+            done += 1
+        else:
+            console.log(f"[yellow]Lease on task {task_id} expired; another worker has taken it over[/yellow]")
+    queue.close()
+    job_scraper.export_metrics(sweep=name, worker=owner)
+    return done
+
+
+def _work_process(name, queue_path, fetch_rate, wait):
+    job_scraper.METRICS_PROM_PATH = ""  # worker processes would overwrite each other's snapshot
+    return work(name, queue_path, fetch_rate, wait)
+
+
+def run_workers(name, processes, queue_path=SWEEP_QUEUE_PATH, fetch_rate=None, wait=False):
+    """Start worker processes on this host; they share the JSearch rate budget evenly"""
+    if processes <= 1:
+        return work(name, queue_path, fetch_rate, wait)
+    rate = (fetch_rate if fetch_rate is not None else job_scraper.FETCH_RATE) / processes
+    with multiprocessing.Pool(processes) as pool:
+        return sum(pool.starmap(_work_process, [(name, queue_path, rate, wait)] * processes))
+
+
+# --- MERGE ---
+def merge(queue, name, csv_path=SWEEP_CSV, parquet_path=SWEEP_PARQUET):
+    """Combine every finished scoring chunk into one results file; returns the DataFrame"""
+    import pandas as pd
+    rows = {}
+    for chunk in queue.results(name, "score"):
+        for job in chunk:
+            rows[job_key(job)] = job
+    df = pd.DataFrame(list(rows.values()))
+    if df.empty:
+        return df
+    df["Match %"] = df["Match %"].astype("Int64")
+    df.sort_values(by="Match %", ascending=False, inplace=True)
+    write_results(df, csv_path, parquet_path)
+    console.log(f"[bold green]✅ Saved {len(df)} jobs to {csv_path}[/bold green]")
+    job_scraper.update_search_index(df)
+    return df
+
+
+def report(queue, name):
+    counts = queue.counts(name)
+    console.log(f"[cyan]Sweep {name}: " + ", ".join(f"{counts.get(s, 0)} {s}" for s in
+                                                     ("pending", "leased", "done", "failed")) + "[/cyan]")
+    for key, attempts, error in queue.failures(name):
+        console.log(f"[red]✗ {key} after {attempts} attempts: {error}[/red]")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded job sweeps worked off a durable SQLite queue")
+    parser.add_argument("--queue", default=SWEEP_QUEUE_PATH, help="queue database shared by all workers (env SWEEP_QUEUE_PATH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    init = sub.add_parser("init", help="queue the fetch tasks of a new sweep")
+    init.add_argument("name")
+    init.add_argument("--roles", nargs="+", default=[os.getenv("JOB_ROLE", "Product Manager")])
+    init.add_argument("--cities", nargs="+", default=json.loads(os.getenv("JOB_CITIES", '["Los Angeles"]')),
+                      help="default env JOB_CITIES")
+    init.add_argument("--pages", type=int, default=1, help="result pages to fetch per role and city")
+    init.add_argument("--resume", default="resume.txt")
+    init.add_argument("--chunk-size", type=int, default=SWEEP_CHUNK_SIZE, help="jobs per scoring task (env SWEEP_CHUNK_SIZE)")
+
+    worker = sub.add_parser("work", help="run worker processes until the sweep is done, then merge")
+    worker.add_argument("name")
+    worker.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    worker.add_argument("--fetch-rate", type=float, default=None,
+                        help="JSearch requests per second for this host, split across its processes (env FETCH_RATE)")
+    worker.add_argument("--wait", action="store_true", help="keep polling for new tasks instead of exiting when idle")
+
+    for command in ("status", "merge"):
+        sub.add_parser(command).add_argument("name")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "work":
+        # Workers open their own connections; none is held across the fork
+        start = time.monotonic()
+        done = run_workers(args.name, max(1, args.processes), args.queue, args.fetch_rate, args.wait)
+        console.log(f"[cyan]{done} tasks done by {args.processes} processes in {time.monotonic() - start:.1f}s[/cyan]")
+    queue = open_queue(args.queue)
+    if args.command == "init":
+        with open(args.resume, "r") as f:
+            init_sweep(queue, args.name, args.roles, args.cities, args.pages, f.read(), args.chunk_size)
+    elif args.command == "work":
+        report(queue, args.name)
+        if queue.drained(args.name):
+            merge(queue, args.name)
+    elif args.command == "status":
+        report(queue, args.name)
+    elif args.command == "merge":
+        report(queue, args.name)
+        merge(queue, args.name)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,185 @@
-import sounddevice as sd
-import numpy as np
-import subprocess
-import queue
-import tempfile
-import soundfile as sf
-from openai import OpenAI
+import argparse
+import io
+import json
 import os
+import queue
+import re
+import time
+import wave
+from collections import deque
 
-client = OpenAI()
+import numpy as np
 
 WAKE_WORD = "sage"  # Say "Sage ..." to trigger it
 
-def record_audio(duration=50, samplerate=16000):
-    input("👉 Press Enter when you’re ready to start talking…")
-    print("🎙️  Recording… speak now!")
-    import time
-    time.sleep(5)
+SAMPLERATE = 16000
+FRAME_MS = 30
+RING_SECONDS = 20  # rolling audio history kept by the daemon
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH")  # optional local keyword spotter model directory
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
+
+
+# --- AUDIO SOURCES ---
+def mic_frames(samplerate=SAMPLERATE, frame_ms=FRAME_MS):
+    """Yield mono float32 frames from the default microphone until the consumer stops"""
+    import sounddevice as sd
+
     q = queue.Queue()
 
     def callback(indata, frames, time, status):
-        q.put(indata.copy())
+        q.put(indata[:, 0].copy())
 
-    with sd.InputStream(samplerate=samplerate, channels=1, callback=callback):
-        frames = []
-        for _ in range(int(duration * samplerate / 1024)):
-            frames.append(q.get())
-        audio_data = np.concatenate(frames, axis=0).flatten()
+    with sd.InputStream(samplerate=samplerate, channels=1, dtype="float32",
+                        blocksize=samplerate * frame_ms // 1000, callback=callback):
+        while True:
+            yield q.get()
 
-    print("✅  Recording complete.")
-    return audio_data, samplerate
 
+def file_frames(path, frame_ms=FRAME_MS, realtime=False):
+    """(frames, samplerate) of a 16-bit PCM WAV, e.g. a prerecorded test fixture"""
+    audio, samplerate = read_wav(path)
+    return array_frames(audio, samplerate, frame_ms, realtime), samplerate
 
-def transcribe_with_whisper(audio_data, samplerate):
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        sf.write(tmp.name, audio_data, samplerate)
-        tmp_path = tmp.name
 
+def array_frames(audio, samplerate=SAMPLERATE, frame_ms=FRAME_MS, realtime=False):
+    """Yield audio in microphone-sized frames; realtime paces them like a live stream"""
+    step = samplerate * frame_ms // 1000
+    for start in range(0, len(audio), step):
+        if realtime:
+            time.sleep(frame_ms / 1000)
+        yield audio[start:start + step]
+
+
+def read_wav(path):
+    """(mono float32 samples, sample rate) from a 16-bit PCM WAV file"""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        samplerate, channels = w.getframerate(), w.getnchannels()
+        pcm = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+    audio = pcm.reshape(-1, channels).mean(axis=1) / 32768.0
+    return audio.astype(np.float32), samplerate
+
+
+def encode_wav(audio, samplerate):
+    """16-bit PCM WAV bytes held in memory, ready to upload"""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(samplerate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+# --- END-OF-SPEECH DETECTION ---
+def rms_db(frame):
+    return 20 * np.log10(np.sqrt(np.mean(np.square(frame, dtype=np.float64))) + 1e-10)
+
+
+class EnergyVAD:
+    """Energy gate with an adaptive noise floor: speech starts above floor + margin, ends after a silence"""
+
+    def __init__(self, frame_ms=FRAME_MS, margin_db=12, min_speech_db=-45, silence_ms=800,
+                 min_speech_ms=200, pre_roll_ms=300):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.silence_frames = silence_ms // frame_ms
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self.noise_db = None
+        self.reset()
+
+    def reset(self):
+        self.speaking = False
+        self.voiced = 0
+        self.quiet = 0
+        self.pre_roll.clear()
+
+    def is_speech(self, level):
+        threshold = max(self.min_speech_db, (self.noise_db if self.noise_db is not None else -90) + self.margin_db)
+        return level > threshold
+
+    def update(self, frame):
+        """Feed one frame; returns "start", "end" or None"""
+        level = rms_db(frame)
+        speech = self.is_speech(level)
+        if not speech and not self.speaking:
+            # Track the background level only while nobody is talking
+            self.noise_db = level if self.noise_db is None else 0.95 * self.noise_db + 0.05 * level
+        if not self.speaking:
+            self.voiced = self.voiced + 1 if speech else 0
+            if self.voiced >= self.min_speech_frames:
+                self.speaking = True
+                self.quiet = 0
+                return "start"
+            return None
+        self.quiet = 0 if speech else self.quiet + 1
+        if self.quiet >= self.silence_frames:
+            self.speaking = False
+            self.voiced = 0
+            return "end"
+        return None
+
+
+def capture_utterance(frames, vad=None, max_seconds=15, wait_seconds=10):
+    """Collect frames from the first speech until the speaker pauses; None if nobody spoke"""
+    vad = vad or EnergyVAD()
+    max_frames = int(max_seconds * 1000 / vad.frame_ms)
+    wait_frames = int(wait_seconds * 1000 / vad.frame_ms)
+    captured = []
+    for i, frame in enumerate(frames):
+        event = vad.update(frame)
+        if not vad.speaking and event is None:
+            vad.pre_roll.append(frame)
+            if i >= wait_frames:
+                return None
+            continue
+        if event == "start":
+            # Keep the quiet lead-in so the first syllable isn't clipped
+            captured.extend(vad.pre_roll)
+            vad.pre_roll.clear()
+        captured.append(frame)
+        if event == "end" or len(captured) >= max_frames:
+            break
+    return np.concatenate(captured) if captured else None
+
+
+def record_audio(frames=None, samplerate=SAMPLERATE):
+    """Listen until the user finishes speaking; returns (audio, samplerate) or (None, samplerate)"""
+    print("🎙️  Listening… speak now!")
+    start = time.monotonic()
+    source = frames if frames is not None else mic_frames(samplerate)
+    try:
+        audio = capture_utterance(source)
+    finally:
+        if hasattr(source, "close"):
+            source.close()  # stops the microphone stream
+    if audio is None:
+        print("🤫  No speech detected.")
+    else:
+        print(f"✅  Captured {len(audio) / samplerate:.1f}s of speech in {time.monotonic() - start:.1f}s.")
+    return audio, samplerate
+
+
+def transcribe_with_whisper(audio_data, samplerate):
     print("🗣️  Transcribing with Whisper...")
-    with open(tmp_path, "rb") as f:
-        transcript = client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
-            file=f,
-            temperature=0  # makes it less "creative"
-        )
-    os.remove(tmp_path)
+    transcript = get_client().audio.transcriptions.create(
+        model="gpt-4o-mini-transcribe",
+        file=("speech.wav", encode_wav(audio_data, samplerate), "audio/wav"),
+        temperature=0  # makes it less "creative"
+    )
     text = transcript.text.strip()
     print(f"👉 You said: {text}")
     return text.lower()
@@ -53,17 +189,19 @@ def parse_command(cmd):
     role = "product manager"
     location = "los angeles"
     threshold = 70
-    words = cmd.split()
+    words = re.sub(r"[^\w\s%]", " ", cmd).split()
 
     if "in" in words:
         idx = words.index("in")
-        if idx + 1 < len(words):
-            location = " ".join(words[idx + 1:])
+        # The location runs up to the threshold clause, so it can go straight into the search
+        rest = words[idx + 1:words.index("above")] if "above" in words[idx + 1:] else words[idx + 1:]
+        if rest:
+            location = " ".join(rest)
     if "above" in words:
         idx = words.index("above")
         if idx + 1 < len(words):
             try:
-                threshold = int(words[idx + 1])
+                threshold = int(words[idx + 1].rstrip("%"))
             except ValueError:
                 pass
 
@@ -75,17 +213,185 @@ def parse_command(cmd):
     return role, location, threshold
 
 
-def main():
-    audio_data, samplerate = record_audio()
+def run_command(cmd, resume_path="resume.txt"):
+    """Start the search a spoken command asks for, in-process on a background thread"""
+    from job_runner import JobRun
+
+    role, location, thresh = parse_command(cmd)
+    print(f"🔎 Searching for {role.title()} jobs in {location.title()} ≥{thresh}% match")
+    with open(resume_path, "r") as f:
+        resume_text = f.read()
+    return JobRun(role.title(), [location.title()], resume_text).start(), thresh
+
+
+def report(run, threshold):
+    """Print the top matches of a finished search at its spoken threshold"""
+    if run.status == "failed":
+        print(f"❌ Search failed: {run.error}")
+        return
+    df = run.df
+    if df is None or df.empty:
+        print("❌ No jobs found.")
+        return
+    top = df[df["Match %"] >= threshold].head(5)
+    print(f"✅ {len(df)} jobs scored in {run.elapsed:.0f}s, {len(df[df['Match %'] >= threshold])} at ≥{threshold}%")
+    for _, j in top.iterrows():
+        print(f"   {j['Match %']:>3}%  {j['Title']} — {j['Company']} ({j['Location']})")
+
+
+# --- WAKE-WORD DAEMON ---
+class RingBuffer:
+    """Fixed-size rolling history of the most recent audio samples"""
+
+    def __init__(self, seconds=RING_SECONDS, samplerate=SAMPLERATE):
+        self.data = np.zeros(int(seconds * samplerate), dtype=np.float32)
+        self.written = 0  # total samples ever written; positions below are absolute
+
+    def write(self, frame):
+        n = len(frame)
+        size = len(self.data)
+        if n >= size:
+            self.data[:] = frame[-size:]
+        else:
+            start = self.written % size
+            first = min(n, size - start)
+            self.data[start:start + first] = frame[:first]
+            self.data[:n - first] = frame[first:]
+        self.written += n
+
+    def since(self, position):
+        """Samples from absolute position up to now (clipped to what is still held)"""
+        size = len(self.data)
+        position = max(position, self.written - size, 0)
+        idx = np.arange(position, self.written) % size
+        return self.data[idx]
+
+
+class VoskSpotter:
+    """Local keyword spotter: a Vosk recogniser restricted to the wake word"""
+
+    def __init__(self, model_path, keyword=WAKE_WORD, samplerate=SAMPLERATE):
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+
+        SetLogLevel(-1)
+        self.keyword = keyword
+        self.samplerate = samplerate
+        self._model = Model(model_path)
+        self._recognizer = lambda: KaldiRecognizer(self._model, samplerate, json.dumps([keyword, "[unk]"]))
+
+    def heard(self, audio):
+        rec = self._recognizer()
+        rec.AcceptWaveform((np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+        return self.keyword in json.loads(rec.FinalResult()).get("text", "")
+
+
+def load_spotter(model_path=VOSK_MODEL_PATH):
+    """VoskSpotter if vosk and a model are available, else None (energy gate only)"""
+    if not model_path:
+        return None
+    try:
+        return VoskSpotter(model_path)
+    except Exception as e:
+        print(f"⚠️  Keyword spotter unavailable ({e}); using the energy gate only.")
+        return None
+
+
+def listen_forever(frames, samplerate=SAMPLERATE, spotter=None, resume_path="resume.txt",
+                   min_seconds=0.4, max_seconds=10, pad_ms=150):
+    """Listen continuously; transcribe only utterances that pass the local gate, and run their searches"""
+    vad = EnergyVAD()
+    ring = RingBuffer(RING_SECONDS, samplerate)
+    frame_len = samplerate * vad.frame_ms // 1000
+    # "start" fires min_speech_frames into the speech; "end" fires silence_frames after it
+    lead_in = vad.min_speech_frames * frame_len
+    tail = vad.silence_frames * frame_len
+    pad = samplerate * pad_ms // 1000
+    start = None
+    run = None
+    stats = {"utterances": 0, "gated": 0, "transcribed": 0, "searches": 0}
+    if spotter is None:
+        print("ℹ️  No keyword spotter configured (set VOSK_MODEL_PATH); every utterance will be transcribed.")
+    print(f"👂 Listening for “{WAKE_WORD.title()} …” (Ctrl+C to stop)")
+
+    for frame in frames:
+        ring.write(frame)
+        event = vad.update(frame)
+        if event == "start":
+            start = ring.written - lead_in
+        elif start is not None and (event == "end" or ring.written - start > max_seconds * samplerate):
+            # Only the voiced span counts towards the length gate and goes out, plus a short pad each side
+            end = ring.written - tail if event == "end" else ring.written
+            voiced = end - start
+            segment = ring.since(start - pad)[:voiced + 2 * pad]
+            start = None
+            vad.reset()
+            stats["utterances"] += 1
+            # Local gate: skip clicks and long background chatter, then the wake-word spotter
+            if not min_seconds <= voiced / samplerate <= max_seconds or (
+                    spotter is not None and not spotter.heard(segment)):
+                stats["gated"] += 1
+                continue
+            stats["transcribed"] += 1
+            cmd = transcribe_with_whisper(segment, samplerate)
+            if WAKE_WORD not in cmd:
+                continue
+            if run is not None and run.running:
+                print("⏹️  Cancelling the previous search.")
+                run.cancel()
+                # Both runs write the shared results journal; let the old one finish its last appends
+                run.join()
+            run, threshold = run_command(cmd, resume_path)
+            stats["searches"] += 1
+
+        if run is not None and not run.running:
+            report(run, threshold)
+            run = None
+
+    if run is not None:
+        # Audio ended (e.g. a fixture file): let the last search finish
+        while run.running:
+            time.sleep(0.2)
+        report(run, threshold)
+    print(f"📊 {stats['utterances']} utterances, {stats['gated']} dropped locally, "
+          f"{stats['transcribed']} transcribed, {stats['searches']} searches")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Voice-triggered job search")
+    parser.add_argument("--audio", metavar="WAV", help="read speech from a 16-bit PCM WAV instead of the microphone")
+    parser.add_argument("--daemon", action="store_true", help="keep listening and react to every “Sage …” command")
+    parser.add_argument("--resume", default="resume.txt")
+    args = parser.parse_args(argv)
+
+    if args.daemon:
+        if args.audio:
+            frames, samplerate = file_frames(args.audio)
+        else:
+            samplerate = SAMPLERATE
+            frames = mic_frames(samplerate)
+        try:
+            listen_forever(frames, samplerate, load_spotter(), args.resume)
+        except KeyboardInterrupt:
+            print("👋 Stopped listening.")
+        return
+
+    if args.audio:
+        audio_data, samplerate = record_audio(*file_frames(args.audio))
+    else:
+        audio_data, samplerate = record_audio()
+    if audio_data is None:
+        return
     cmd = transcribe_with_whisper(audio_data, samplerate)
 
     if WAKE_WORD not in cmd:
         print(f"🛑 I didn’t hear my name (‘{WAKE_WORD}’) — not running a search.")
         return
 
-    role, location, thresh = parse_command(cmd)
-    print(f"🔎 Searching for {role.title()} jobs in {location.title()} ≥{thresh}% match")
-    subprocess.run(["python3", "job_scraper.py"])
+    run, threshold = run_command(cmd, args.resume)
+    while run.running:
+        time.sleep(0.2)
+    report(run, threshold)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+# --- DURABLE WORK QUEUE ---
+class WorkQueue:
+    """SQLite queue of tasks that worker processes lease, finish or give back.
+
+    A lease hides a task from other workers for `visibility_timeout` seconds; a worker
+    that dies simply lets its lease lapse and the task is handed out again. Any number
+    of processes may share the file, including on other hosts when the filesystem's
+    locking is reliable.
+    """
+
+    def __init__(self, path="sweep.sqlite", visibility_timeout=120, max_attempts=5):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sweeps ("
+            " name TEXT PRIMARY KEY,"
+            " config TEXT NOT NULL,"
+            " created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY,"
+            " sweep TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"  # pending, leased, done, failed
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " available_at REAL NOT NULL,"
+            " lease_owner TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " UNIQUE (sweep, key));"
+            "CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (sweep, status, available_at);"
+            "CREATE TABLE IF NOT EXISTS claims ("
+            " sweep TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " PRIMARY KEY (sweep, key));"
+        )
+
+    @contextmanager
+    def _write(self):
+        """One write transaction, taking the database write lock up front"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # --- SWEEPS ---
+    def create_sweep(self, name, config):
+        """Register a sweep; returns False (keeping the old config) if it already exists"""
+        with self._write() as conn:
+            cur = conn.execute("INSERT OR IGNORE INTO sweeps (name, config, created_at) VALUES (?, ?, ?)",
+                               (name, json.dumps(config), time.time()))
+        return cur.rowcount == 1
+
+    def sweep_config(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT config FROM sweeps WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # --- TASKS ---
+    def enqueue(self, sweep, tasks, conn=None):
+        """Add (key, kind, payload) tasks; keys already queued for the sweep are ignored"""
+        rows = [(sweep, key, kind, json.dumps(payload), time.time()) for key, kind, payload in tasks]
+        sql = "INSERT OR IGNORE INTO tasks (sweep, key, kind, payload, available_at) VALUES (?, ?, ?, ?, ?)"
+        if conn is not None:
+            return conn.executemany(sql, rows).rowcount
+        with self._write() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def lease(self, sweep, owner):
+        """Claim the next ready task as (id, kind, payload, attempt), or None if nothing is ready"""
+        now = time.time()
+        with self._write() as conn:
+            # An expired lease counts as ready: its worker died or stalled. One that keeps
+            # killing its workers stops being handed out after max_attempts.
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired', lease_owner = NULL"
+                " WHERE sweep = ? AND status = 'leased' AND available_at <= ? AND attempts >= ?",
+                (sweep, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM tasks"
+                " WHERE sweep = ? AND status IN ('pending', 'leased') AND available_at <= ?"
+                " ORDER BY kind = 'score' DESC, id LIMIT 1",
+                (sweep, now),
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, kind, payload, attempts = row
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, attempts = attempts + 1, available_at = ?"
+                " WHERE id = ?",
+                (owner, now + self.visibility_timeout, task_id),
+            )
+        return task_id, kind, json.loads(payload), attempts + 1
+
+    def extend(self, task_id, owner):
+        """Push back the lease deadline of a task still being worked on; False if the lease was lost"""
+        with self._write() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET available_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + self.visibility_timeout, task_id, owner),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, task_id, owner, result, sweep=None, claim=(), follow_up=None):
+        """Store a task's result and, in the same transaction, claim keys and queue follow-up tasks.
+
+        follow_up(fresh_keys) gets the keys of claim no earlier task in the sweep had
+        claimed and returns (key, kind, payload) tasks. Returns False when the lease had
+        expired and another worker took the task over, in which case nothing is written.
+        """
+        with self._write() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL"
+                " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (json.dumps(result), task_id, owner),
+            )
+            if cur.rowcount != 1:
+                return False
+            fresh = [key for key in claim
+                     if conn.execute("INSERT OR IGNORE INTO claims (sweep, key) VALUES (?, ?)", (sweep, key)).rowcount]
+            if follow_up is not None:
+                self.enqueue(sweep, follow_up(fresh), conn)
+        return True
+
+    def fail(self, task_id, owner, error, backoff=5.0):
+        """Give a task back for a retry after an exponential backoff, or mark it failed for good"""
+        with self._write() as conn:
+            row = conn.execute("SELECT attempts FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                               (task_id, owner)).fetchone()
+            if row is None:
+                return None
+            final = row[0] >= self.max_attempts
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, available_at = ? WHERE id = ?",
+                ("failed" if final else "pending", str(error), time.time() + backoff * 2 ** (row[0] - 1), task_id),
+            )
+        return "failed" if final else "retry"
+
+    # --- PROGRESS ---
+    def counts(self, sweep):
+        """{status: number of tasks} for the sweep, with expired leases counted as pending"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND available_at <= ? THEN 'pending' ELSE status END, COUNT(*)"
+                " FROM tasks WHERE sweep = ? GROUP BY 1",
+                (time.time(), sweep),
+            ).fetchall()
+        return dict(rows)
+
+    def drained(self, sweep):
+        """True once every task is done or failed for good"""
+        counts = self.counts(sweep)
+        return not counts.get("pending") and not counts.get("leased")
+
+    def results(self, sweep, kind):
+        """Results of the sweep's finished tasks of one kind, in queue order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM tasks WHERE sweep = ? AND kind = ? AND status = 'done' ORDER BY id",
+                (sweep, kind),
+            ).fetchall()
+        return [json.loads(result) for (result,) in rows]
+
+    def failures(self, sweep):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, attempts, error FROM tasks WHERE sweep = ? AND status = 'failed' ORDER BY id",
+                (sweep,),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()